@@ -47,7 +47,7 @@ Use get_climate_data to fetch hardiness zone and frost dates.""",
     "plant_selection": """Phase 2: Plant Selection
 Based on climate data and user requirements, query the plant database for suitable plants.
 Consider: hardiness zone, sun requirements, space constraints, growing goals.
-Check companion compatibility between selected plants.""",
+Check companion compatibility between all selected plants in one call with check_companion_matrix.""",
     
     "layout_planning": """Phase 3: Layout Planning
 Create an efficient spatial arrangement that respects:
@@ -3,6 +3,7 @@ from .garden_tools import (
     GetClimateDataTool,
     QueryPlantDatabaseTool,
     CheckCompanionCompatibilityTool,
+    CheckCompanionMatrixTool,
     CalculatePlanterLayoutTool,
     GeneratePlantingScheduleTool,
     GenerateGardenVisualizationTool
@@ -15,6 +16,7 @@ __all__ = [
     "GetClimateDataTool",
     "QueryPlantDatabaseTool",
     "CheckCompanionCompatibilityTool",
+    "CheckCompanionMatrixTool",
     "CalculatePlanterLayoutTool",
     "GeneratePlantingScheduleTool",
     "GenerateGardenVisualizationTool"
@@ -0,0 +1,474 @@
+import bisect
+import calendar
+import csv
+import hashlib
+import mmap
+import os
+import re
+import stat
+import struct
+import sys
+import tempfile
+from array import array
+from dataclasses import dataclass
+from datetime import date
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+
+_MONTHS = {name.lower(): i for i, name in enumerate(calendar.month_abbr) if name}
+# Day-of-year offsets of each month in a non-leap year.
+_MONTH_STARTS = [0, 0, 31, 59, 90, 120, 151, 181, 212, 243, 273, 304, 334]
+_MONTH_LENGTHS = [0, 31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31]
+_MONTH_DAY_PATTERN = re.compile(r'^(?:\d{4}-)?([A-Za-z]{3})[- ](\d{1,2})$')
+_ISO_DATE_PATTERN = re.compile(r'^\d{4}-(\d{2})-(\d{2})')
+_FROST_FREE_LABELS = {"", "n/a", "infrequent", "n/a (frost-free)"}
+
+
+def _day_of_year(month: int, day: int) -> Optional[int]:
+    if not 1 <= month <= 12 or day < 1:
+        return None
+    return _MONTH_STARTS[month] + min(day, _MONTH_LENGTHS[month])
+
+
+def parse_frost_date(label: Optional[str]) -> Tuple[Optional[int], bool]:
+    value = (label or "").strip()
+    match = _ISO_DATE_PATTERN.match(value)
+    if match:
+        return _day_of_year(int(match.group(1)), int(match.group(2))), False
+
+    match = _MONTH_DAY_PATTERN.match(value)
+    if match:
+        month = _MONTHS.get(match.group(1).lower(), 0)
+        return _day_of_year(month, int(match.group(2))), False
+
+    value = re.sub(r'^\d{4}-', '', value).lower()
+    return None, value in _FROST_FREE_LABELS
+
+
+def date_from_day_of_year(year: int, day_of_year: int) -> date:
+    if calendar.isleap(year) and day_of_year > _MONTH_STARTS[3]:
+        day_of_year += 1
+    return date.fromordinal(date(year, 1, 1).toordinal() + day_of_year - 1)
+
+
+def shared_file_mode(path: str) -> int:
+    # Mode for a file replacing path: the current mode if it exists, otherwise what open() would give.
+    try:
+        return stat.S_IMODE(os.stat(path).st_mode)
+    except FileNotFoundError:
+        umask = os.umask(0)
+        os.umask(umask)
+        return 0o666 & ~umask
+
+
+@dataclass(slots=True)
+class ClimateRecord:
+    hardiness_zone: str
+    last_spring_frost: Optional[int]
+    first_fall_frost: Optional[int]
+    growing_season_days: int
+    frost_free: bool
+    last_spring_label: str = ""
+    first_fall_label: str = ""
+
+    @classmethod
+    def from_frost_dates(cls, frost_dates: Dict[str, Any]) -> "ClimateRecord":
+        last_spring_label = frost_dates.get("last_spring_frost") or ""
+        first_fall_label = frost_dates.get("first_fall_frost") or ""
+        last_spring, frost_free = parse_frost_date(last_spring_label)
+        first_fall, _ = parse_frost_date(first_fall_label)
+
+        return cls(
+            hardiness_zone=frost_dates.get("hardiness_zone", ""),
+            last_spring_frost=last_spring,
+            first_fall_frost=first_fall,
+            growing_season_days=frost_dates.get("growing_season_days") or 0,
+            frost_free=frost_free,
+            last_spring_label=last_spring_label,
+            first_fall_label=first_fall_label
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "hardiness_zone": self.hardiness_zone,
+            "last_spring_frost": self.last_spring_label,
+            "first_fall_frost": self.first_fall_label,
+            "growing_season_days": self.growing_season_days
+        }
+
+
+class ClimateIndex:
+
+    FROST_FREE = "N/A (frost-free)"
+
+    SNAPSHOT_MAGIC = b'CLIX'
+    SNAPSHOT_VERSION = 1
+    SNAPSHOT_SUFFIX = '.climate'
+    # magic, version, little-endian flag, reserved, source size, source mtime_ns,
+    # source sha256, record count, zone table bytes, frost table bytes
+    _SNAPSHOT_HEADER = struct.Struct('<4sBBHQQ32sIII')
+
+    def __init__(self,
+                 zipcodes: Sequence[int],
+                 zone_codes: Sequence[int],
+                 spring_codes: Sequence[int],
+                 fall_codes: Sequence[int],
+                 season_days: Sequence[int],
+                 zones: List[str],
+                 frost_dates: List[str],
+                 source: Optional[Tuple[int, int, bytes]] = None):
+        self.zipcodes = zipcodes
+        self.zone_codes = zone_codes
+        self.spring_codes = spring_codes
+        self.fall_codes = fall_codes
+        self.season_days = season_days
+        self.zones = zones
+        self.frost_dates = frost_dates
+        self.source = source
+
+        parsed = [parse_frost_date(label) for label in frost_dates]
+        self.frost_days = [day for day, _ in parsed]
+        self.frost_free = [free for _, free in parsed]
+
+    @classmethod
+    def empty(cls) -> "ClimateIndex":
+        return cls(array('I'), array('B'), array('H'), array('H'), array('H'), [], [])
+
+    @classmethod
+    def from_csv(cls, csv_path: str) -> "ClimateIndex":
+        zones: List[str] = []
+        zone_lookup: Dict[str, int] = {}
+        frost_dates: List[str] = []
+        frost_lookup: Dict[str, int] = {}
+        raw_frost_lookup: Dict[str, int] = {}
+        raw_season_lookup: Dict[str, int] = {}
+
+        zipcodes = array('I')
+        zone_codes = array('B')
+        spring_codes = array('H')
+        fall_codes = array('H')
+        season_days = array('H')
+
+        def zone_code(value: str) -> int:
+            code = zone_lookup.get(value)
+            if code is None:
+                code = zone_lookup[value] = len(zones)
+                zones.append(value)
+            return code
+
+        def frost_code(value: str) -> int:
+            code = raw_frost_lookup.get(value)
+            if code is None:
+                formatted = cls._format_frost_date(value)
+                code = frost_lookup.get(formatted)
+                if code is None:
+                    code = frost_lookup[formatted] = len(frost_dates)
+                    frost_dates.append(formatted)
+                raw_frost_lookup[value] = code
+            return code
+
+        def days(value: str) -> int:
+            parsed = raw_season_lookup.get(value)
+            if parsed is None:
+                parsed = raw_season_lookup[value] = cls._parse_season_days(value)
+            return parsed
+
+        in_order = True
+        previous = -1
+        with open(csv_path, 'r', encoding='utf-8', newline='') as f:
+            reader = csv.reader(f)
+            header = next(reader, None)
+            if header is None:
+                return cls.empty()
+
+            zip_col = header.index('zipcode')
+            zone_col = header.index('zone')
+            spring_col = header.index('last_spring_frost')
+            fall_col = header.index('first_fall_frost')
+            season_col = header.index('growing_season')
+
+            for row in reader:
+                zipcode = cls._zip_to_int(row[zip_col])
+                if zipcode is None:
+                    continue
+                if zipcode <= previous:
+                    in_order = False
+                previous = zipcode
+
+                zipcodes.append(zipcode)
+                zone_codes.append(zone_code(row[zone_col]))
+                spring_codes.append(frost_code(row[spring_col]))
+                fall_codes.append(frost_code(row[fall_col]))
+                season_days.append(days(row[season_col]))
+
+        if not in_order:
+            # Later rows win for duplicate zipcodes, matching the old dict-based loader.
+            latest = {zipcode: i for i, zipcode in enumerate(zipcodes)}
+            order = [latest[zipcode] for zipcode in sorted(latest)]
+            zipcodes = array('I', (zipcodes[i] for i in order))
+            zone_codes = array('B', (zone_codes[i] for i in order))
+            spring_codes = array('H', (spring_codes[i] for i in order))
+            fall_codes = array('H', (fall_codes[i] for i in order))
+            season_days = array('H', (season_days[i] for i in order))
+
+        return cls(zipcodes, zone_codes, spring_codes, fall_codes, season_days, zones, frost_dates)
+
+    @classmethod
+    def load(cls, csv_path: str, snapshot_path: Optional[str] = None) -> "ClimateIndex":
+        snapshot_path = snapshot_path or cls.snapshot_path_for(csv_path)
+
+        try:
+            stat = os.stat(csv_path)
+        except FileNotFoundError:
+            return cls.from_snapshot(snapshot_path)
+
+        try:
+            snapshot = cls.from_snapshot(snapshot_path)
+        except (OSError, ValueError):
+            snapshot = None
+
+        if snapshot is not None:
+            size, mtime_ns, _ = snapshot.source
+            if size == stat.st_size and mtime_ns == stat.st_mtime_ns:
+                return snapshot
+
+        digest = cls._file_digest(csv_path)
+        source = (stat.st_size, stat.st_mtime_ns, digest)
+
+        if snapshot is not None and snapshot.source[2] == digest:
+            index = snapshot
+        else:
+            index = cls.from_csv(csv_path)
+
+        try:
+            index.write_snapshot(snapshot_path, source)
+        except OSError:
+            pass
+        return index
+
+    @classmethod
+    def snapshot_path_for(cls, csv_path: str) -> str:
+        return os.path.splitext(csv_path)[0] + cls.SNAPSHOT_SUFFIX
+
+    @staticmethod
+    def _file_digest(path: str) -> bytes:
+        with open(path, 'rb') as f:
+            return hashlib.file_digest(f, 'sha256').digest()
+
+    @classmethod
+    def _snapshot_layout(cls, count: int, zones_size: int, frost_size: int) -> Dict[str, Tuple[int, int]]:
+        offset = cls._SNAPSHOT_HEADER.size + zones_size + frost_size
+        offset += -offset % 4
+
+        layout = {}
+        for name, itemsize in (('zipcodes', 4), ('spring_codes', 2), ('fall_codes', 2),
+                               ('season_days', 2), ('zone_codes', 1)):
+            layout[name] = (offset, offset + count * itemsize)
+            offset += count * itemsize
+        layout['end'] = (offset, offset)
+        return layout
+
+    def write_snapshot(self, snapshot_path: str, source: Tuple[int, int, bytes]):
+        zones_blob = '\n'.join(self.zones).encode('utf-8')
+        frost_blob = '\n'.join(self.frost_dates).encode('utf-8')
+        count = len(self.zipcodes)
+        layout = self._snapshot_layout(count, len(zones_blob), len(frost_blob))
+
+        header = self._SNAPSHOT_HEADER.pack(
+            self.SNAPSHOT_MAGIC, self.SNAPSHOT_VERSION, sys.byteorder == 'little', 0,
+            source[0], source[1], source[2], count, len(zones_blob), len(frost_blob)
+        )
+
+        directory = os.path.dirname(os.path.abspath(snapshot_path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.climate-', suffix='.tmp')
+        os.fchmod(fd, shared_file_mode(snapshot_path))
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(header)
+                f.write(zones_blob)
+                f.write(frost_blob)
+                f.write(b'\0' * (layout['zipcodes'][0] - f.tell()))
+                f.write(array('I', self.zipcodes))
+                f.write(array('H', self.spring_codes))
+                f.write(array('H', self.fall_codes))
+                f.write(array('H', self.season_days))
+                f.write(array('B', self.zone_codes))
+            os.replace(tmp_path, snapshot_path)
+        except BaseException:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+            raise
+
+    @classmethod
+    def from_snapshot(cls, snapshot_path: str) -> "ClimateIndex":
+        if array('I').itemsize != 4:
+            raise ValueError("Climate snapshots require a 4-byte unsigned int")
+
+        with open(snapshot_path, 'rb') as f:
+            if os.fstat(f.fileno()).st_size < cls._SNAPSHOT_HEADER.size:
+                raise ValueError(f"Climate snapshot {snapshot_path} is truncated")
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        (magic, version, little_endian, _, size, mtime_ns, digest,
+         count, zones_size, frost_size) = cls._SNAPSHOT_HEADER.unpack_from(mapped)
+
+        if magic != cls.SNAPSHOT_MAGIC or version != cls.SNAPSHOT_VERSION:
+            raise ValueError(f"Unsupported climate snapshot format in {snapshot_path}")
+        if bool(little_endian) != (sys.byteorder == 'little'):
+            raise ValueError(f"Climate snapshot {snapshot_path} was built on a different byte order")
+
+        layout = cls._snapshot_layout(count, zones_size, frost_size)
+        if len(mapped) != layout['end'][0]:
+            raise ValueError(f"Climate snapshot {snapshot_path} is truncated")
+
+        tables_start = cls._SNAPSHOT_HEADER.size
+        zones_blob = mapped[tables_start:tables_start + zones_size].decode('utf-8')
+        frost_blob = mapped[tables_start + zones_size:tables_start + zones_size + frost_size].decode('utf-8')
+
+        view = memoryview(mapped)
+
+        def column(name: str, typecode: str) -> memoryview:
+            start, end = layout[name]
+            return view[start:end].cast(typecode)
+
+        return cls(
+            column('zipcodes', 'I'),
+            column('zone_codes', 'B'),
+            column('spring_codes', 'H'),
+            column('fall_codes', 'H'),
+            column('season_days', 'H'),
+            zones_blob.split('\n') if zones_size else [],
+            frost_blob.split('\n') if frost_size else [],
+            source=(size, mtime_ns, digest)
+        )
+
+    @staticmethod
+    def _zip_to_int(zipcode: Any) -> Optional[int]:
+        if not isinstance(zipcode, str) or len(zipcode) != 5:
+            return None
+        if not (zipcode.isascii() and zipcode.isdigit()):
+            return None
+        return int(zipcode)
+
+    @classmethod
+    def _format_frost_date(cls, value: str) -> str:
+        if value and value != "N/A":
+            return f"2024-{value.replace(' ', '-')}"
+        return cls.FROST_FREE
+
+    @staticmethod
+    def _parse_season_days(growing_season: str) -> int:
+        days_match = growing_season.split()[0] if growing_season else "0"
+        try:
+            return max(0, min(int(days_match), 0xFFFF))
+        except ValueError:
+            return 0
+
+    def __len__(self) -> int:
+        return len(self.zipcodes)
+
+    def __contains__(self, zipcode: Any) -> bool:
+        return self.position(zipcode) is not None
+
+    def position(self, zipcode: Any) -> Optional[int]:
+        key = self._zip_to_int(zipcode)
+        if key is None:
+            return None
+
+        i = bisect.bisect_left(self.zipcodes, key)
+        if i < len(self.zipcodes) and self.zipcodes[i] == key:
+            return i
+        return None
+
+    def nearest_position(self, zipcode: Any) -> Optional[int]:
+        key = self._zip_to_int(zipcode)
+        if key is None:
+            return None
+
+        column = self.zipcodes
+        prefix_start = key - key % 100
+        lo = bisect.bisect_left(column, prefix_start)
+        hi = bisect.bisect_left(column, prefix_start + 100, lo)
+        if lo == hi:
+            return None
+
+        i = bisect.bisect_left(column, key, lo, hi)
+        if i == hi:
+            return hi - 1
+        if i == lo or column[i] - key < key - column[i - 1]:
+            return i
+        return i - 1
+
+    def zipcode_at(self, i: int) -> str:
+        return f"{self.zipcodes[i]:05d}"
+
+    def record_at(self, i: int) -> ClimateRecord:
+        spring_code = self.spring_codes[i]
+        fall_code = self.fall_codes[i]
+        return ClimateRecord(
+            hardiness_zone=self.zones[self.zone_codes[i]],
+            last_spring_frost=self.frost_days[spring_code],
+            first_fall_frost=self.frost_days[fall_code],
+            growing_season_days=self.season_days[i],
+            frost_free=self.frost_free[spring_code],
+            last_spring_label=self.frost_dates[spring_code],
+            first_fall_label=self.frost_dates[fall_code]
+        )
+
+    def get(self, zipcode: Any) -> Optional[ClimateRecord]:
+        i = self.position(zipcode)
+        if i is None:
+            return None
+        return self.record_at(i)
+
+    def lookup_many(self, zipcodes: Iterable[Any]) -> Dict[str, Any]:
+        requested = list(zipcodes)
+        keys: Dict[Any, Optional[int]] = {}
+        for zipcode in requested:
+            if zipcode not in keys:
+                keys[zipcode] = self._zip_to_int(zipcode) if isinstance(zipcode, str) else None
+
+        found_at: Dict[int, int] = {}
+        column = self.zipcodes
+        count = len(column)
+        lo = 0
+        for key in sorted({key for key in keys.values() if key is not None}):
+            lo = bisect.bisect_left(column, key, lo)
+            if lo < count and column[lo] == key:
+                found_at[key] = lo
+
+        found: List[Any] = []
+        rows: List[int] = []
+        missing: List[Any] = []
+        invalid: List[Any] = []
+        for zipcode in requested:
+            key = keys[zipcode]
+            if key is None:
+                invalid.append(zipcode)
+            elif key in found_at:
+                found.append(zipcode)
+                rows.append(found_at[key])
+            else:
+                missing.append(zipcode)
+
+        zones, zone_codes = self.zones, self.zone_codes
+        frost_dates, spring_codes, fall_codes = self.frost_dates, self.spring_codes, self.fall_codes
+        season_days = self.season_days
+        return {
+            "zipcode": found,
+            "hardiness_zone": [zones[zone_codes[i]] for i in rows],
+            "last_spring_frost": [frost_dates[spring_codes[i]] for i in rows],
+            "first_fall_frost": [frost_dates[fall_codes[i]] for i in rows],
+            "growing_season_days": [season_days[i] for i in rows],
+            "missing": missing,
+            "invalid": invalid
+        }
+
+
+if __name__ == "__main__":
+    default_csv = os.path.join(os.path.dirname(__file__), '..', '..', 'data', 'phzm_us_zipcode_2023.csv')
+    csv_path = sys.argv[1] if len(sys.argv) > 1 else default_csv
+    index = ClimateIndex.load(csv_path)
+    print(f"Climate snapshot {ClimateIndex.snapshot_path_for(csv_path)} holds {len(index)} zipcodes")
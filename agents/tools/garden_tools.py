@@ -1,18 +1,21 @@
-from typing import Dict, Any, List, Optional
-from datetime import datetime, timedelta
-import csv
+from typing import Dict, Any, Iterable, List, Optional, Tuple
+from datetime import date, datetime
 import os
+import threading
 from agents.tools.tool_registry import Tool
+from agents.tools.climate_index import ClimateIndex, ClimateRecord, date_from_day_of_year
+from agents.tools.name_resolver import NameResolver
 from agents.tools.pfaf_database import PFAFDatabase
 
 
 class GetClimateDataTool(Tool):
     _climate_database = None
+    _climate_lock = threading.Lock()
     
     def __init__(self):
         super().__init__(
             name="get_climate_data",
-            description="Retrieves USDA hardiness zone and frost dates for a zipcode",
+            description="Retrieves USDA hardiness zone and frost dates for a zipcode. Unknown zipcodes resolve to the nearest known zipcode in the same area and are flagged approximate",
             parameters={
                 "zipcode": {
                     "type": "string",
@@ -22,42 +25,25 @@ class GetClimateDataTool(Tool):
             }
         )
     
-    def _load_climate_data(self) -> Dict[str, Any]:
-        if GetClimateDataTool._climate_database is not None:
+    def _load_climate_data(self) -> ClimateIndex:
+        climate_db = GetClimateDataTool._climate_database
+        if climate_db is not None:
+            return climate_db
+        
+        with GetClimateDataTool._climate_lock:
+            if GetClimateDataTool._climate_database is None:
+                csv_path = os.path.join(os.path.dirname(__file__), '..', '..', 'data', 'phzm_us_zipcode_2023.csv')
+                
+                try:
+                    GetClimateDataTool._climate_database = ClimateIndex.load(csv_path)
+                except FileNotFoundError:
+                    GetClimateDataTool._climate_database = ClimateIndex.empty()
+            
             return GetClimateDataTool._climate_database
-        
-        GetClimateDataTool._climate_database = {}
-        csv_path = os.path.join(os.path.dirname(__file__), '..', '..', 'data', 'phzm_us_zipcode_2023.csv')
-        
-        try:
-            with open(csv_path, 'r', encoding='utf-8') as f:
-                reader = csv.DictReader(f)
-                for row in reader:
-                    zipcode = row['zipcode']
-                    zone = row['zone']
-                    last_spring = row['last_spring_frost']
-                    first_fall = row['first_fall_frost']
-                    growing_season = row['growing_season']
-                    
-                    days_match = growing_season.split()[0] if growing_season else "0"
-                    try:
-                        days = int(days_match)
-                    except ValueError:
-                        days = 0
-                    
-                    last_spring_date = f"2024-{last_spring.replace(' ', '-')}" if last_spring and last_spring != "N/A" else "N/A (frost-free)"
-                    first_fall_date = f"2024-{first_fall.replace(' ', '-')}" if first_fall and first_fall != "N/A" else "N/A (frost-free)"
-                    
-                    GetClimateDataTool._climate_database[zipcode] = {
-                        "hardiness_zone": zone,
-                        "last_spring_frost": last_spring_date,
-                        "first_fall_frost": first_fall_date,
-                        "growing_season_days": days
-                    }
-        except FileNotFoundError:
-            pass
-        
-        return GetClimateDataTool._climate_database
+    
+    def warm_up(self):
+        super().warm_up()
+        self._load_climate_data()
     
     def run(self, **kwargs) -> Dict[str, Any]:
         zipcode = kwargs.get("zipcode")
@@ -66,20 +52,31 @@ class GetClimateDataTool(Tool):
             return {"error": "Invalid zipcode format. Please provide a 5-digit US postal code."}
         
         climate_db = self._load_climate_data()
+        record = climate_db.get(zipcode)
         
-        if zipcode not in climate_db:
-            return {
-                "error": f"Zipcode {zipcode} not found in database. Please provide a different zipcode or your USDA zone manually."
-            }
+        if record is None:
+            nearest = climate_db.nearest_position(zipcode)
+            if nearest is None:
+                return {
+                    "error": f"Zipcode {zipcode} not found in database. Please provide a different zipcode or your USDA zone manually."
+                }
+            
+            result = climate_db.record_at(nearest).to_dict()
+            result["approximate"] = True
+            result["matched_zipcode"] = climate_db.zipcode_at(nearest)
+            return result
         
-        return climate_db[zipcode]
+        return record.to_dict()
+    
+    def run_batch(self, zipcodes: Iterable[str]) -> Dict[str, Any]:
+        return self._load_climate_data().lookup_many(zipcodes)
 
 
 class QueryPlantDatabaseTool(Tool):
     def __init__(self, pfaf_db: Optional[PFAFDatabase] = None):
         super().__init__(
             name="query_plant_database",
-            description="Searches for plants matching growing requirements",
+            description="Searches for plants matching growing requirements and returns the best matches, ranked by edibility, medicinal value, growth habit and fit for the space",
             parameters={
                 "hardiness_zone": {
                     "type": "string",
@@ -133,8 +130,29 @@ class QueryPlantDatabaseTool(Tool):
         except FileNotFoundError:
             self.use_pfaf = False
             self.plant_database = self._load_fallback_database()
+        self._fallback_resolver: Optional[NameResolver] = None
     
-    def _load_fallback_database(self) -> List[Dict[str, Any]]:
+    def warm_up(self):
+        super().warm_up()
+        if self.use_pfaf:
+            self.pfaf_db.warm_up()
+        self._name_resolver()
+    
+    def _name_resolver(self) -> NameResolver:
+        if self.use_pfaf:
+            return self.pfaf_db.name_resolver(KNOWN_PLANT_NAMES)
+        if self._fallback_resolver is None:
+            self._fallback_resolver = NameResolver(KNOWN_PLANT_NAMES)
+        return self._fallback_resolver
+    
+    def _resolve_filter_term(self, term: str) -> str:
+        # PFAF filters match substrings, so a generic term like "bean" must reach every plant that contains it.
+        if self.use_pfaf and self.pfaf_db.has_common_name_match(term):
+            return term
+        return self._name_resolver().canonical(term)
+    
+    @staticmethod
+    def _load_fallback_database() -> List[Dict[str, Any]]:
         return [
             {
                 "common_name": "Tomato",
@@ -279,19 +297,24 @@ class QueryPlantDatabaseTool(Tool):
         zone = kwargs.get("hardiness_zone")
         sun = kwargs.get("sun_requirement")
         plant_type = kwargs.get("plant_type")
-        whitelist = kwargs.get("whitelist", [])
-        blacklist = kwargs.get("blacklist", [])
+        whitelist = kwargs.get("whitelist") or []
+        blacklist = kwargs.get("blacklist") or []
+        space_category = kwargs.get("space_category")
+        
+        whitelist = [self._resolve_filter_term(name) for name in whitelist]
+        blacklist = [self._resolve_filter_term(name) for name in blacklist]
         
         if self.use_pfaf:
             try:
-                results = self.pfaf_db.query_plants(
+                results = self.pfaf_db.rank_plants(
                     hardiness_zone=zone,
                     sun_requirement=sun,
                     plant_type=plant_type,
                     edible_only=True,
                     whitelist=whitelist,
                     blacklist=blacklist,
-                    limit=20
+                    space_category=space_category,
+                    k=10
                 )
                 
                 if not results:
@@ -302,7 +325,7 @@ class QueryPlantDatabaseTool(Tool):
                     }
                 
                 return {
-                    "plant_list": results[:10],
+                    "plant_list": results,
                     "source": "PFAF",
                     "total_found": len(results)
                 }
@@ -350,10 +373,10 @@ class QueryPlantDatabaseTool(Tool):
 
 
 class CheckCompanionCompatibilityTool(Tool):
-    def __init__(self):
+    def __init__(self, pfaf_db: Optional[PFAFDatabase] = None):
         super().__init__(
             name="check_companion_compatibility",
-            description="Validates companion planting relationships between plants",
+            description="Validates companion planting relationships between plants, drawing on the PFAF companion graph when available",
             parameters={
                 "plant_a": {
                     "type": "string",
@@ -368,8 +391,27 @@ class CheckCompanionCompatibilityTool(Tool):
             }
         )
         self.compatibility_data = self._load_compatibility_data()
+        try:
+            self.pfaf_db = pfaf_db or PFAFDatabase()
+        except FileNotFoundError:
+            self.pfaf_db = None
+        self._fallback_resolver: Optional[NameResolver] = None
+    
+    def warm_up(self):
+        super().warm_up()
+        if self.pfaf_db is not None:
+            self.pfaf_db.warm_up()
+        self._name_resolver()
     
-    def _load_compatibility_data(self) -> Dict[str, Dict[str, Dict[str, Any]]]:
+    def _name_resolver(self) -> NameResolver:
+        if self.pfaf_db is not None:
+            return self.pfaf_db.name_resolver(KNOWN_PLANT_NAMES)
+        if self._fallback_resolver is None:
+            self._fallback_resolver = NameResolver(KNOWN_PLANT_NAMES)
+        return self._fallback_resolver
+    
+    @staticmethod
+    def _load_compatibility_data() -> Dict[str, Dict[str, Dict[str, Any]]]:
         return {
             "tomato": {
                 "basil": {
@@ -410,17 +452,65 @@ class CheckCompanionCompatibilityTool(Tool):
         }
     
     def run(self, **kwargs) -> Dict[str, Any]:
-        plant_a = kwargs.get("plant_a", "").lower()
-        plant_b = kwargs.get("plant_b", "").lower()
+        resolver = self._name_resolver()
+        plant_a = resolver.canonical(kwargs.get("plant_a", "")).lower()
+        plant_b = resolver.canonical(kwargs.get("plant_b", "")).lower()
         
-        if plant_a in self.compatibility_data:
-            if plant_b in self.compatibility_data[plant_a]:
-                return self.compatibility_data[plant_a][plant_b]
+        relationship = self._curated_relationship(plant_a, plant_b)
+        if relationship is None and self.pfaf_db is not None and plant_a and plant_b:
+            relationship = self.pfaf_db.get_companion_relationship(plant_a, plant_b)
         
-        if plant_b in self.compatibility_data:
-            if plant_a in self.compatibility_data[plant_b]:
-                return self.compatibility_data[plant_b][plant_a]
+        return relationship or self._neutral_relationship()
+    
+    def run_batch(self, plants: Iterable[str]) -> Dict[str, Any]:
+        resolver = self._name_resolver()
+        names: Dict[str, str] = {}
+        for plant in plants:
+            if plant:
+                name = resolver.canonical(plant)
+                names.setdefault(name.lower(), name)
+        keys = list(names)
+        
+        # One graph query covers every pair the curated data does not.
+        pfaf_relationships = self.pfaf_db.get_companion_relationships(keys) if self.pfaf_db is not None else {}
+        
+        matrix: Dict[str, Dict[str, str]] = {name: {} for name in names.values()}
+        conflicts = []
+        beneficial = []
+        for i, plant_a in enumerate(keys):
+            for plant_b in keys[i + 1:]:
+                relationship = (
+                    self._curated_relationship(plant_a, plant_b)
+                    or pfaf_relationships.get((plant_a, plant_b))
+                    or self._neutral_relationship()
+                )
+                name_a, name_b = names[plant_a], names[plant_b]
+                matrix[name_a][name_b] = relationship["relationship"]
+                matrix[name_b][name_a] = relationship["relationship"]
+                
+                if relationship["relationship"] == "antagonistic":
+                    conflicts.append({"plant_a": name_a, "plant_b": name_b, **relationship})
+                elif relationship["relationship"] == "beneficial":
+                    beneficial.append({"plant_a": name_a, "plant_b": name_b, **relationship})
         
+        conflicts.sort(key=lambda pair: -pair["confidence"])
+        beneficial.sort(key=lambda pair: -pair["confidence"])
+        return {
+            "plants": list(names.values()),
+            "matrix": matrix,
+            "conflicts": conflicts,
+            "beneficial": beneficial
+        }
+    
+    def _curated_relationship(self, plant_a: str, plant_b: str) -> Optional[Dict[str, Any]]:
+        for first, second in ((plant_a, plant_b), (plant_b, plant_a)):
+            relationship = self.compatibility_data.get(first, {}).get(second)
+            if relationship is not None:
+                return relationship
+        return None
+    
+    @staticmethod
+    def _neutral_relationship() -> Dict[str, Any]:
         return {
             "relationship": "neutral",
             "reason": "No known interaction between these plants",
@@ -428,6 +518,50 @@ class CheckCompanionCompatibilityTool(Tool):
         }
 
 
+class CheckCompanionMatrixTool(Tool):
+    def __init__(self, companion_tool: Optional[CheckCompanionCompatibilityTool] = None):
+        super().__init__(
+            name="check_companion_matrix",
+            description="Checks companion planting compatibility between every pair in a list of plants in one call. Returns the symmetric compatibility matrix plus the conflicting and beneficial pairs",
+            parameters={
+                "plants": {
+                    "type": "array",
+                    "items": {
+                        "type": "string"
+                    },
+                    "description": "Common or scientific names of the plants to check",
+                    "required": True
+                }
+            }
+        )
+        self.companion_tool = companion_tool or CheckCompanionCompatibilityTool()
+    
+    def warm_up(self):
+        super().warm_up()
+        self.companion_tool.warm_up()
+    
+    def run(self, **kwargs) -> Dict[str, Any]:
+        plants = kwargs.get("plants") or []
+        if len(plants) < 2:
+            return {"error": "Provide at least two plants to check companion compatibility."}
+        
+        return self.companion_tool.run_batch(plants)
+
+
+def known_plant_names() -> Tuple[str, ...]:
+    names = []
+    for plant in QueryPlantDatabaseTool._load_fallback_database():
+        names.extend([plant["common_name"], plant["scientific_name"]])
+    for plant, companions in CheckCompanionCompatibilityTool._load_compatibility_data().items():
+        names.append(plant.title())
+        names.extend(companion.title() for companion in companions)
+    return tuple(names)
+
+
+# Built once; the resolvers key their cache on this exact tuple.
+KNOWN_PLANT_NAMES = known_plant_names()
+
+
 class CalculatePlanterLayoutTool(Tool):
     def __init__(self):
         super().__init__(
@@ -556,15 +690,22 @@ class GeneratePlantingScheduleTool(Tool):
         current_date_str = kwargs.get("current_date")
         succession = kwargs.get("succession_planting", False)
         
-        current_date = datetime.now()
+        current_date = date.today()
         if current_date_str and current_date_str != "N/A (frost-free)":
             try:
-                current_date = datetime.fromisoformat(current_date_str)
-            except:
+                current_date = datetime.fromisoformat(current_date_str).date()
+            except (TypeError, ValueError):
                 pass
         
-        last_frost_str = frost_dates.get("last_spring_frost", "")
-        first_frost_str = frost_dates.get("first_fall_frost", "")
+        if isinstance(frost_dates, ClimateRecord):
+            climate = frost_dates
+        else:
+            climate = ClimateRecord.from_frost_dates(frost_dates or {})
+        
+        today = current_date.toordinal()
+        last_frost = None
+        if climate.last_spring_frost is not None:
+            last_frost = date_from_day_of_year(current_date.year, climate.last_spring_frost).toordinal()
         
         schedule = []
         
@@ -573,47 +714,43 @@ class GeneratePlantingScheduleTool(Tool):
             days_to_maturity = plant.get("days_to_maturity", 60)
             planting_method = plant.get("planting_method", "seed")
             
-            if last_frost_str == "N/A (frost-free)" or not last_frost_str:
-                plant_date_start = current_date
-                plant_date_end = current_date + timedelta(days=14)
+            if climate.frost_free:
+                plant_date_start = today
+                plant_date_end = today + 14
                 action = "direct_sow" if planting_method in ["seed", "both"] else "transplant"
+            elif last_frost is None:
+                plant_date_start = today
+                plant_date_end = today + 14
+                action = "direct_sow"
+            elif planting_method == "transplant":
+                plant_date_start = last_frost - 42
+                plant_date_end = last_frost - 28
+                action = "start_indoors"
             else:
-                try:
-                    last_frost = datetime.fromisoformat(last_frost_str)
-                    
-                    if planting_method == "transplant":
-                        plant_date_start = last_frost - timedelta(days=42)
-                        plant_date_end = last_frost - timedelta(days=28)
-                        action = "start_indoors"
-                    else:
-                        plant_date_start = last_frost + timedelta(days=7)
-                        plant_date_end = last_frost + timedelta(days=21)
-                        action = "direct_sow"
-                except:
-                    plant_date_start = current_date
-                    plant_date_end = current_date + timedelta(days=14)
-                    action = "direct_sow"
+                plant_date_start = last_frost + 7
+                plant_date_end = last_frost + 21
+                action = "direct_sow"
             
-            expected_harvest = plant_date_end + timedelta(days=days_to_maturity)
+            expected_harvest = plant_date_end + int(days_to_maturity)
             
             schedule.append({
                 "plant_name": plant_name,
                 "action": action,
-                "date_range_start": plant_date_start.strftime("%Y-%m-%d"),
-                "date_range_end": plant_date_end.strftime("%Y-%m-%d"),
-                "expected_harvest": expected_harvest.strftime("%Y-%m-%d"),
+                "date_range_start": date.fromordinal(plant_date_start).isoformat(),
+                "date_range_end": date.fromordinal(plant_date_end).isoformat(),
+                "expected_harvest": date.fromordinal(expected_harvest).isoformat(),
                 "notes": f"Plant {plant_name} approximately {days_to_maturity} days before harvest"
             })
             
             if succession and plant.get("continuous_harvest"):
-                second_planting = plant_date_end + timedelta(days=21)
-                second_harvest = second_planting + timedelta(days=days_to_maturity)
+                second_planting = plant_date_end + 21
+                second_harvest = second_planting + int(days_to_maturity)
                 schedule.append({
                     "plant_name": f"{plant_name} (succession)",
                     "action": action,
-                    "date_range_start": second_planting.strftime("%Y-%m-%d"),
-                    "date_range_end": (second_planting + timedelta(days=7)).strftime("%Y-%m-%d"),
-                    "expected_harvest": second_harvest.strftime("%Y-%m-%d"),
+                    "date_range_start": date.fromordinal(second_planting).isoformat(),
+                    "date_range_end": date.fromordinal(second_planting + 7).isoformat(),
+                    "expected_harvest": date.fromordinal(second_harvest).isoformat(),
                     "notes": "Succession planting for extended harvest"
                 })
         
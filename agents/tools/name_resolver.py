@@ -0,0 +1,100 @@
+import math
+import re
+from dataclasses import dataclass
+from typing import Dict, FrozenSet, Iterable, List, Optional
+
+
+_WORD = re.compile(r"[a-z0-9]+")
+
+
+def stem(word: str) -> str:
+    # Plural folding is all plant names need; query and catalogue go through the same rules.
+    if len(word) > 4 and word.endswith("ies"):
+        return word[:-3] + "y"
+    if len(word) > 4 and word.endswith(("oes", "ches", "shes", "xes", "sses")):
+        return word[:-2]
+    if len(word) > 3 and word.endswith("s") and not word.endswith(("ss", "us", "is")):
+        return word[:-1]
+    return word
+
+
+def normalize_name(name: str) -> str:
+    return " ".join(stem(word) for word in _WORD.findall(name.lower()))
+
+
+def trigrams(normalized: str) -> FrozenSet[str]:
+    grams = set()
+    for word in normalized.split():
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return frozenset(grams)
+
+
+@dataclass(slots=True, frozen=True)
+class NameMatch:
+    name: str
+    score: float
+
+    def to_dict(self) -> Dict[str, object]:
+        return {"name": self.name, "score": self.score}
+
+
+class NameResolver:
+    def __init__(self, names: Iterable[str], min_score: float = 0.5):
+        self.min_score = min_score
+        self.names: List[str] = []
+        self._exact: Dict[str, int] = {}
+        self._grams: List[FrozenSet[str]] = []
+        self._postings: Dict[str, List[int]] = {}
+
+        for name in names:
+            key = normalize_name(name or "")
+            if not key or key in self._exact:
+                continue
+            position = len(self.names)
+            self.names.append(name)
+            self._exact[key] = position
+            grams = trigrams(key)
+            self._grams.append(grams)
+            for gram in grams:
+                self._postings.setdefault(gram, []).append(position)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def resolve(self, name: str, min_score: Optional[float] = None) -> Optional[NameMatch]:
+        key = normalize_name(name or "")
+        position = self._exact.get(key)
+        if position is not None:
+            return NameMatch(self.names[position], 1.0)
+
+        grams = trigrams(key)
+        if not grams:
+            return None
+        threshold = self.min_score if min_score is None else min_score
+
+        # Any name scoring at least the threshold shares one of the query's rarest trigrams,
+        # so only those posting lists need to be read.
+        ordered = sorted(grams, key=lambda gram: len(self._postings.get(gram, ())))
+        prefix = ordered[:len(ordered) - math.ceil(threshold * len(ordered)) + 1]
+        candidates = set()
+        for gram in prefix:
+            candidates.update(self._postings.get(gram, ()))
+
+        best_score = 0.0
+        best_position = -1
+        for candidate in candidates:
+            other = self._grams[candidate]
+            shared = len(grams & other)
+            score = shared / (len(grams) + len(other) - shared)
+            if score > best_score or (score == best_score and candidate < best_position):
+                best_score = score
+                best_position = candidate
+
+        if best_position < 0 or best_score < threshold:
+            return None
+        return NameMatch(self.names[best_position], round(best_score, 3))
+
+    def canonical(self, name: str) -> str:
+        match = self.resolve(name)
+        return match.name if match else name
@@ -0,0 +1,156 @@
+import sqlite3
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+HAS_NUMPY = np is not None
+
+_NO_ZONE_MIN = 32767
+_NO_ZONE_MAX = -32768
+
+
+def as_float(value: Any) -> float:
+    try:
+        return float(value or 0)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+class PFAFColumns:
+    MAX_NAME_MASKS = 1024
+
+    def __init__(self,
+                 ids: "np.ndarray",
+                 edible: "np.ndarray",
+                 zone_min: "np.ndarray",
+                 zone_max: "np.ndarray",
+                 sun_codes: "np.ndarray",
+                 sun_classes: Sequence[str],
+                 habit_codes: "np.ndarray",
+                 habits: List[Optional[str]],
+                 has_common_name: "np.ndarray",
+                 edibility: "np.ndarray",
+                 medicinal: "np.ndarray",
+                 height: "np.ndarray",
+                 records: List[Dict[str, Any]]):
+        self.ids = ids
+        self.edible = edible
+        self.zone_min = zone_min
+        self.zone_max = zone_max
+        self.sun_codes = sun_codes
+        self.sun_classes = list(sun_classes)
+        self.habit_codes = habit_codes
+        self.habits = habits
+        self.has_common_name = has_common_name
+        self.edibility = edibility
+        self.medicinal = medicinal
+        self.height = height
+        self.records = records
+        self._name_masks: Dict[str, "np.ndarray"] = {}
+
+    @classmethod
+    def load(cls, conn: sqlite3.Connection, sun_classes: Sequence[str], build_record) -> "PFAFColumns":
+        if np is None:
+            raise ImportError("PFAFColumns requires numpy")
+
+        rows = conn.execute("""
+            SELECT
+                t.plant_id,
+                t.edible,
+                t.zone_min,
+                t.zone_max,
+                p.habit,
+                p.latin_name,
+                p.common_name,
+                p.height,
+                p.hardiness,
+                p.edibility_rating,
+                p.medicinal_rating,
+                p.summary,
+                p.edible_uses,
+                t.sun_class,
+                t.habit_class,
+                t.spacing_feet
+            FROM traits.plant_traits t
+            JOIN plants p ON p.rowid = t.plant_id
+            ORDER BY t.plant_id
+        """).fetchall()
+
+        sun_lookup = {sun_class: code for code, sun_class in enumerate(sun_classes)}
+        habit_lookup: Dict[Optional[str], int] = {}
+        habit_codes = []
+        records = []
+        for row in rows:
+            habit_codes.append(habit_lookup.setdefault(row[4], len(habit_lookup)))
+            records.append(build_record((row[0],) + row[5:]))
+
+        return cls(
+            ids=np.array([row[0] for row in rows], dtype=np.int64),
+            edible=np.array([bool(row[1]) for row in rows], dtype=bool),
+            zone_min=np.array([_NO_ZONE_MIN if row[2] is None else row[2] for row in rows], dtype=np.int32),
+            zone_max=np.array([_NO_ZONE_MAX if row[3] is None else row[3] for row in rows], dtype=np.int32),
+            sun_codes=np.array([sun_lookup[row[13]] for row in rows], dtype=np.int8),
+            sun_classes=sun_classes,
+            habit_codes=np.array(habit_codes, dtype=np.int32),
+            habits=list(habit_lookup),
+            has_common_name=np.array([row[6] is not None for row in rows], dtype=bool),
+            edibility=np.array([as_float(row[9]) for row in rows], dtype=np.float32),
+            medicinal=np.array([as_float(row[10]) for row in rows], dtype=np.float32),
+            height=np.array([as_float(row[7]) for row in rows], dtype=np.float32),
+            records=records
+        )
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def mask(self,
+             requested_zone: Optional[int] = None,
+             allowed_sun: Optional[Sequence[str]] = None,
+             plant_type: Optional[str] = None,
+             edible_only: bool = True,
+             include: Optional["np.ndarray"] = None,
+             exclude: Optional["np.ndarray"] = None) -> "np.ndarray":
+        mask = self.edible.copy() if edible_only else np.ones(len(self.ids), dtype=bool)
+
+        if requested_zone is not None:
+            mask &= (self.zone_min <= requested_zone) & (self.zone_max >= requested_zone)
+
+        if allowed_sun is not None:
+            allowed = np.zeros(len(self.sun_classes), dtype=bool)
+            allowed[[self.sun_classes.index(sun_class) for sun_class in allowed_sun]] = True
+            mask &= allowed[self.sun_codes]
+
+        if plant_type:
+            matching = np.array([habit is not None and plant_type in habit.lower() for habit in self.habits], dtype=bool)
+            mask &= matching[self.habit_codes]
+
+        if include is not None:
+            mask &= include
+
+        if exclude is not None:
+            # Mirrors the SQL blacklist, where a NULL common name never passes instr() = 0.
+            mask &= self.has_common_name & ~exclude
+
+        return mask
+
+    def names_mask(self, terms: Sequence[str], resolve: Callable[[str], Sequence[int]]) -> "np.ndarray":
+        # Term masks live as long as these columns, which are reloaded whenever the database changes.
+        mask = np.zeros(len(self.ids), dtype=bool)
+        for term in terms:
+            term_mask = self._name_masks.get(term)
+            if term_mask is None:
+                term_mask = np.isin(self.ids, np.asarray(resolve(term), dtype=np.int64))
+                if len(self._name_masks) < self.MAX_NAME_MASKS:
+                    self._name_masks[term] = term_mask
+            mask |= term_mask
+        return mask
+
+    def select(self, mask: "np.ndarray", limit: int) -> List[Dict[str, Any]]:
+        positions = np.flatnonzero(mask)
+        if limit >= 0:
+            positions = positions[:limit]
+        return [self.records[i] for i in positions]
@@ -1,8 +1,156 @@
+import heapq
 import sqlite3
 import os
-from typing import List, Dict, Any, Optional
+import re
+import tempfile
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import List, Dict, Any, Iterable, Iterator, Optional, Tuple
 from pathlib import Path
 
+from agents.tools.climate_index import shared_file_mode
+from agents.tools.name_resolver import NameResolver
+from agents.tools.pfaf_columns import HAS_NUMPY, PFAFColumns, as_float
+
+
+_COMPANION_CUES = (
+    (re.compile(r"\b(?:does not|doesn't|do not) grow well (?:with|near)\b"), "antagonistic", 0.8),
+    (re.compile(r"\bgrows? badly (?:with|near)\b"), "antagonistic", 0.8),
+    (re.compile(r"\binhibits? the growth of\b"), "antagonistic", 0.7),
+    (re.compile(r"\bshould not be grown near\b"), "antagonistic", 0.7),
+    (re.compile(r"\bgrows? well (?:with|near)\b"), "beneficial", 0.8),
+    (re.compile(r"\bgood companion (?:plant )?(?:for|to)\b"), "beneficial", 0.8),
+    (re.compile(r"\bcompanion plant for\b"), "beneficial", 0.7)
+)
+_SENTENCE_END = re.compile(r"(?<=[.;!?])\s+")
+_WORD = re.compile(r"[a-z]+(?:[-'][a-z]+)*")
+_MAX_NAME_WORDS = 4
+
+
+class FrozenDict(dict):
+    def _readonly(self, *args, **kwargs):
+        raise TypeError("cached plant results are read-only")
+    
+    __setitem__ = __delitem__ = _readonly
+    clear = pop = popitem = setdefault = update = _readonly
+    __ior__ = _readonly
+    
+    def __reduce__(self):
+        return (FrozenDict, (dict(self),))
+
+
+@dataclass(slots=True, frozen=True)
+class PlantRecord:
+    plant_id: int
+    latin_name: str
+    common_name: str
+    plant_type: str
+    hardiness_zones: Tuple[str, ...]
+    sun_requirement: str
+    spacing_feet: float
+    edibility_rating: Any
+    medicinal_rating: Any
+    height_meters: Optional[float]
+    summary: str
+    edible_uses: str
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "latin_name": self.latin_name,
+            "common_name": self.common_name,
+            "plant_type": self.plant_type,
+            "hardiness_zones": list(self.hardiness_zones),
+            "sun_requirement": self.sun_requirement,
+            "spacing_feet": self.spacing_feet,
+            "edibility_rating": self.edibility_rating,
+            "medicinal_rating": self.medicinal_rating,
+            "height_meters": self.height_meters,
+            "summary": self.summary,
+            "edible_uses": self.edible_uses
+        }
+
+
+def _freeze(value: Any) -> Any:
+    if isinstance(value, FrozenDict):
+        return value
+    if isinstance(value, dict):
+        return FrozenDict((key, _freeze(item)) for key, item in value.items())
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(item) for item in value)
+    return value
+
+
+class QueryCache:
+    def __init__(self, max_entries: int = 256, ttl: Optional[float] = None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[Tuple, Tuple[float, Any]]" = OrderedDict()
+        self._stamp: Optional[str] = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+    
+    def _check_stamp(self, stamp: str):
+        if stamp != self._stamp:
+            if self._entries:
+                self.invalidations += 1
+            self._entries.clear()
+            self._stamp = stamp
+    
+    def get(self, key: Tuple, stamp: str) -> Optional[Any]:
+        with self._lock:
+            self._check_stamp(stamp)
+            entry = self._entries.get(key)
+            if entry is not None and self.ttl is not None and time.monotonic() - entry[0] > self.ttl:
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+    
+    def put(self, key: Tuple, stamp: str, value: Any) -> Any:
+        value = _freeze(value)
+        if self.max_entries <= 0:
+            return value
+        with self._lock:
+            self._check_stamp(stamp)
+            self._entries[key] = (time.monotonic(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return value
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+    
+    def info(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl": self.ttl
+            }
+
+
+def _close_connections(connections: List[sqlite3.Connection], lock: threading.Lock):
+    with lock:
+        while connections:
+            connections.pop().close()
+
 
 class PFAFDatabase:
     
@@ -15,17 +163,310 @@ class PFAFDatabase:
         'FSN': 'full_sun'       # Tolerates all (mark as full sun capable)
     }
     
-    def __init__(self, db_path: Optional[str] = None):
+    MMAP_SIZE = 256 * 1024 * 1024
+    CACHE_SIZE_KB = 16 * 1024
+    CACHED_STATEMENTS = 256
+    
+    INDEX_SUFFIX = ".index.sqlite"
+    DEFAULT_INDEX_NAME = "pfaf.index.sqlite"
+    INDEX_VERSION = 4
+    SUN_CLASSES = ("full_sun", "partial_shade", "full_shade", "unknown")
+    EXCLUDED_SUN_CLASSES = {
+        "full_sun": ("partial_shade", "full_shade"),
+        "partial_shade": ("full_shade",),
+        "full_shade": ("full_sun",)
+    }
+    
+    HABIT_SCORES = {
+        "annual": 1.0,
+        "perennial": 1.0,
+        "vine": 0.5,
+        "shrub": 0.0,
+        "tree": -1.0
+    }
+    SPACE_LIMITS_FEET = {
+        "small": 1.0,
+        "medium": 3.0,
+        "large": 10.0
+    }
+    FILTER_KEYS = ("hardiness_zone", "sun_requirement", "plant_type", "edible_only", "whitelist", "blacklist")
+    EDIBILITY_WEIGHT = 1.0
+    MEDICINAL_WEIGHT = 0.5
+    
+    def __init__(self,
+                 db_path: Optional[str] = None,
+                 immutable: bool = False,
+                 index_path: Optional[str] = None,
+                 cache_size: int = 256,
+                 cache_ttl: Optional[float] = None,
+                 engine: str = "auto"):
         if db_path is None:
             project_root = Path(__file__).parent.parent.parent
             db_path = project_root / "data" / "pfaf-data" / "data.sqlite"
+            # pfaf-data is a submodule, so the default sidecar lives beside it where .gitignore can cover it.
+            index_path = index_path or project_root / "data" / self.DEFAULT_INDEX_NAME
         
         self.db_path = str(db_path)
         if not os.path.exists(self.db_path):
             raise FileNotFoundError(f"PFAF database not found at {self.db_path}")
+        
+        if engine not in ("auto", "numpy", "sqlite"):
+            raise ValueError(f"Unknown PFAF query engine: {engine}")
+        if engine == "numpy" and not HAS_NUMPY:
+            raise ImportError("The numpy PFAF engine requires numpy to be installed")
+        
+        if engine == "auto":
+            engine = "numpy" if HAS_NUMPY else "sqlite"
+        
+        self.engine = engine
+        self.immutable = immutable
+        self.index_path = str(index_path) if index_path else os.path.splitext(self.db_path)[0] + self.INDEX_SUFFIX
+        self._index_lock = threading.Lock()
+        self._index_available = False
+        self._index_stamp: Optional[str] = None
+        self._query_cache = QueryCache(cache_size, cache_ttl)
+        self._columns_lock = threading.Lock()
+        self._columns: Optional[PFAFColumns] = None
+        self._columns_stamp: Optional[str] = None
+        self._resolver_lock = threading.Lock()
+        self._resolver: Optional[Tuple[Tuple, NameResolver]] = None
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+        self._connections_lock = threading.Lock()
+        self._finalizer = weakref.finalize(self, _close_connections, self._connections, self._connections_lock)
+    
+    def _read_only_uri(self, path: str) -> str:
+        uri = f"{Path(path).resolve().as_uri()}?mode=ro"
+        if self.immutable:
+            uri += "&immutable=1"
+        return uri
+    
+    def _get_connection(self) -> sqlite3.Connection:
+        stamp = self._source_stamp()
+        conn = getattr(self._local, "conn", None)
+        if conn is not None and self._local.stamp != stamp:
+            # The database file changed; reopen so this thread sees the rebuilt index.
+            with self._connections_lock:
+                self._connections.remove(conn)
+            conn.close()
+            conn = None
+        if conn is None:
+            # Each thread only ever uses its own connection; close() may run from another thread.
+            conn = sqlite3.connect(self._read_only_uri(self.db_path), uri=True, check_same_thread=False,
+                                   cached_statements=self.CACHED_STATEMENTS)
+            conn.execute(f"PRAGMA mmap_size={self.MMAP_SIZE}")
+            conn.execute(f"PRAGMA cache_size=-{self.CACHE_SIZE_KB}")
+            if self._ensure_index(stamp):
+                conn.execute("ATTACH DATABASE ? AS traits", (self._read_only_uri(self.index_path),))
+            else:
+                conn.execute("ATTACH DATABASE ':memory:' AS traits")
+                self._populate_index(conn, "main", "traits")
+            with self._connections_lock:
+                self._connections.append(conn)
+            self._local.conn = conn
+            self._local.stamp = stamp
+        return conn
+    
+    def close(self):
+        _close_connections(self._connections, self._connections_lock)
+        self._local = threading.local()
+    
+    def __enter__(self) -> "PFAFDatabase":
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+    
+    def warm_up(self):
+        self._get_connection().execute("SELECT 1 FROM plants LIMIT 1").fetchall()
+        if self.engine == "numpy":
+            self._load_columns()
+    
+    def _load_columns(self) -> PFAFColumns:
+        conn = self._get_connection()
+        stamp = self._local.stamp
+        with self._columns_lock:
+            if self._columns_stamp != stamp:
+                self._columns = PFAFColumns.load(conn, self.SUN_CLASSES, lambda row: _freeze(self._plant_record(row).to_dict()))
+                self._columns_stamp = stamp
+            return self._columns
     
-    def _get_connection(self):
-        return sqlite3.connect(self.db_path)
+    def name_resolver(self, extra_names: Iterable[str] = ()) -> NameResolver:
+        extra_names = extra_names if isinstance(extra_names, tuple) else tuple(extra_names)
+        conn = self._get_connection()
+        key = (self._local.stamp, extra_names)
+        cached = self._resolver
+        if cached is not None and cached[0] == key:
+            return cached[1]
+        with self._resolver_lock:
+            if self._resolver is None or self._resolver[0] != key:
+                # Extra names come first so curated spellings win over PFAF duplicates.
+                names = list(extra_names)
+                for common_name, latin_name in conn.execute("SELECT common_name, latin_name FROM plants ORDER BY rowid"):
+                    names.extend((common_name, latin_name))
+                self._resolver = (key, NameResolver(names))
+            return self._resolver[1]
+    
+    def _source_stamp(self) -> str:
+        stat = os.stat(self.db_path)
+        return f"{self.INDEX_VERSION}:{stat.st_size}:{stat.st_mtime_ns}"
+    
+    def _index_is_current(self, stamp: str) -> bool:
+        if not os.path.exists(self.index_path):
+            return False
+        try:
+            conn = sqlite3.connect(self._read_only_uri(self.index_path), uri=True)
+            try:
+                row = conn.execute("SELECT value FROM index_meta WHERE key = 'source'").fetchone()
+            finally:
+                conn.close()
+        except sqlite3.Error:
+            return False
+        return row is not None and row[0] == stamp
+    
+    def _ensure_index(self, stamp: str) -> bool:
+        with self._index_lock:
+            if self._index_stamp != stamp:
+                self._index_stamp = stamp
+                if self._index_is_current(stamp):
+                    self._index_available = True
+                else:
+                    try:
+                        self.build_index(stamp)
+                        self._index_available = True
+                    except (OSError, sqlite3.Error):
+                        # Read-only checkouts still work; each connection builds the index in memory.
+                        self._index_available = False
+            return self._index_available
+    
+    def build_index(self, stamp: Optional[str] = None):
+        stamp = stamp or self._source_stamp()
+        directory = os.path.dirname(os.path.abspath(self.index_path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=f".{os.path.basename(self.index_path)}-", suffix=".tmp")
+        os.fchmod(fd, shared_file_mode(self.index_path))
+        os.close(fd)
+        try:
+            conn = sqlite3.connect(tmp_path)
+            try:
+                conn.execute("ATTACH DATABASE ? AS source", (self._read_only_uri(self.db_path),))
+                self._populate_index(conn, "source", "main")
+                conn.execute("CREATE TABLE index_meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+                conn.execute("INSERT INTO index_meta VALUES ('source', ?)", (stamp,))
+                conn.commit()
+                conn.execute("DETACH DATABASE source")
+            finally:
+                conn.close()
+            os.replace(tmp_path, self.index_path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+    
+    def _populate_index(self, conn: sqlite3.Connection, source: str, target: str):
+        conn.execute(f"""
+            CREATE TABLE {target}.plant_traits (
+                plant_id INTEGER PRIMARY KEY,
+                edible INTEGER NOT NULL,
+                zone_min INTEGER,
+                zone_max INTEGER,
+                sun_class TEXT NOT NULL,
+                habit_class TEXT NOT NULL,
+                spacing_feet REAL NOT NULL
+            )
+        """)
+        rows = conn.execute(f"""
+            SELECT rowid, edibility_rating > 0, hardiness, shade, habit, height
+            FROM {source}.plants
+        """).fetchall()
+        traits = []
+        for plant_id, edible, hardiness, shade, habit, height in rows:
+            zone_min, zone_max = self._zone_bounds(hardiness)
+            traits.append((
+                plant_id,
+                1 if edible else 0,
+                zone_min,
+                zone_max,
+                self._parse_sun_requirement(shade),
+                self._parse_habit(habit),
+                self._calculate_spacing(habit, height)
+            ))
+        conn.executemany(f"INSERT INTO {target}.plant_traits VALUES (?, ?, ?, ?, ?, ?, ?)", traits)
+        conn.execute(f"CREATE VIRTUAL TABLE {target}.plant_names USING fts5(common_name, latin_name, tokenize='trigram')")
+        conn.execute(f"""
+            INSERT INTO {target}.plant_names (rowid, common_name, latin_name)
+            SELECT rowid, common_name, latin_name FROM {source}.plants
+        """)
+        conn.execute(f"CREATE INDEX {target}.plant_traits_edible_sun_zone ON plant_traits (edible, sun_class, zone_min, zone_max)")
+        conn.execute(f"CREATE INDEX {target}.plant_traits_zone ON plant_traits (zone_min, zone_max)")
+        conn.execute(f"""
+            CREATE TABLE {target}.companion_edges (
+                plant_id INTEGER NOT NULL,
+                companion_id INTEGER NOT NULL,
+                relationship TEXT NOT NULL,
+                confidence REAL NOT NULL,
+                reason TEXT NOT NULL,
+                PRIMARY KEY (plant_id, companion_id)
+            ) WITHOUT ROWID
+        """)
+        conn.executemany(
+            f"INSERT INTO {target}.companion_edges VALUES (?, ?, ?, ?, ?)",
+            self._companion_edges(conn.execute(f"""
+                SELECT rowid, common_name, latin_name, cultivation_details, summary
+                FROM {source}.plants
+            """).fetchall())
+        )
+        conn.execute(f"CREATE INDEX {target}.companion_edges_reverse ON companion_edges (companion_id, plant_id)")
+        conn.execute(f"ANALYZE {target}")
+        conn.commit()
+    
+    def _companion_edges(self, rows: List[Tuple]) -> List[Tuple]:
+        names: Dict[str, int] = {}
+        for plant_id, common_name, latin_name, _, _ in rows:
+            for name in (common_name, latin_name):
+                if name:
+                    names.setdefault(" ".join(_WORD.findall(name.lower())), plant_id)
+        
+        edges: Dict[Tuple[int, int], Tuple] = {}
+        for plant_id, _, _, cultivation, summary in rows:
+            text = " ".join(part for part in (cultivation, summary) if part)
+            for sentence in _SENTENCE_END.split(text):
+                lowered = sentence.lower()
+                matches = sorted(
+                    (match.start(), -match.end(), relationship, confidence)
+                    for pattern, relationship, confidence in _COMPANION_CUES
+                    for match in pattern.finditer(lowered)
+                )
+                cues = []
+                for start, negative_end, relationship, confidence in matches:
+                    # "does not grow well with" also contains the positive cue; keep only the outer match.
+                    if cues and start < cues[-1][1]:
+                        continue
+                    cues.append((start, -negative_end, relationship, confidence))
+                for i, (_, end, relationship, confidence) in enumerate(cues):
+                    stop = cues[i + 1][0] if i + 1 < len(cues) else len(lowered)
+                    for companion_id in self._mentioned_plants(lowered[end:stop], names):
+                        key = (plant_id, companion_id)
+                        if companion_id != plant_id and (key not in edges or edges[key][3] < confidence):
+                            edges[key] = (plant_id, companion_id, relationship, confidence, sentence.strip()[:200])
+        return list(edges.values())
+    
+    def _mentioned_plants(self, text: str, names: Dict[str, int]) -> List[int]:
+        words = _WORD.findall(text)
+        found = []
+        i = 0
+        while i < len(words):
+            for n in range(min(_MAX_NAME_WORDS, len(words) - i), 0, -1):
+                phrase = " ".join(words[i:i + n])
+                plant_id = names.get(phrase)
+                if plant_id is None and phrase.endswith("s"):
+                    # Cultivation notes usually name companions in the plural ("tomatoes", "beans").
+                    plant_id = names.get(phrase[:-2] if phrase.endswith("oes") else phrase[:-1])
+                if plant_id is not None:
+                    found.append(plant_id)
+                    i += n
+                    break
+            else:
+                i += 1
+        return found
     
     def _parse_sun_requirement(self, shade_code: str) -> str:
         if not shade_code:
@@ -82,22 +523,43 @@ class PFAFDatabase:
         else:
             return 1.0
     
-    def _zone_matches(self, requested_zone: str, plant_hardiness: str) -> bool:
-        if not plant_hardiness:
-            return False
+    def _name_search(self, terms: List[str], column: Optional[str] = None) -> Tuple[str, List[str]]:
+        # Trigram MATCH needs at least three characters; shorter terms fall back to LIKE on the same table.
+        long_terms = [term for term in terms if len(term) >= 3]
+        short_terms = [term for term in terms if len(term) < 3]
+        columns = [column] if column else ["common_name", "latin_name"]
         
-        requested_num = int(''.join(filter(str.isdigit, requested_zone)))
+        clauses = []
+        params: List[str] = []
+        if long_terms:
+            expression = " OR ".join('"' + term.replace('"', '""') + '"' for term in long_terms)
+            if column:
+                expression = f"{column} : ({expression})"
+            clauses.append("SELECT rowid FROM traits.plant_names WHERE plant_names MATCH ?")
+            params.append(expression)
+        for term in short_terms:
+            pattern = "%" + term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+            conditions = " OR ".join(f"{name} LIKE ? ESCAPE '\\'" for name in columns)
+            clauses.append(f"SELECT rowid FROM traits.plant_names WHERE {conditions}")
+            params.extend([pattern] * len(columns))
         
-        parts = plant_hardiness.split('-')
-        if len(parts) == 2:
-            try:
-                start = int(parts[0])
-                end = int(parts[1])
-                return start <= requested_num <= end
-            except ValueError:
-                return False
+        return " UNION ".join(clauses), params
+    
+    def _zone_bounds(self, hardiness: str) -> Tuple[Optional[int], Optional[int]]:
+        if not hardiness:
+            return None, None
         
-        return str(requested_num) in plant_hardiness
+        parts = hardiness.split('-')
+        try:
+            if len(parts) == 2:
+                return int(parts[0]), int(parts[1])
+            if len(parts) == 1:
+                zone = int(parts[0])
+                return zone, zone
+        except ValueError:
+            pass
+        
+        return None, None
     
     def query_plants(self, 
                      hardiness_zone: Optional[str] = None,
@@ -106,125 +568,292 @@ class PFAFDatabase:
                      edible_only: bool = True,
                      whitelist: Optional[List[str]] = None,
                      blacklist: Optional[List[str]] = None,
-                     limit: int = 50) -> List[Dict[str, Any]]:
+                     limit: int = 50) -> Tuple[Dict[str, Any], ...]:
+        
+        key = self._query_key(hardiness_zone, sun_requirement, plant_type, edible_only, whitelist, blacklist) + (limit,)
+        stamp = self._source_stamp()
+        cached = self._query_cache.get(key, stamp)
+        if cached is not None:
+            return cached
+        
+        results = self._query_plants(*key)
+        return self._query_cache.put(key, stamp, results)
+    
+    def rank_plants(self,
+                    hardiness_zone: Optional[str] = None,
+                    sun_requirement: Optional[str] = None,
+                    plant_type: Optional[str] = None,
+                    edible_only: bool = True,
+                    whitelist: Optional[List[str]] = None,
+                    blacklist: Optional[List[str]] = None,
+                    space_category: Optional[str] = None,
+                    k: int = 10) -> Tuple[Dict[str, Any], ...]:
+        space_category = space_category if space_category in self.SPACE_LIMITS_FEET else None
+        query_key = self._query_key(hardiness_zone, sun_requirement, plant_type, edible_only, whitelist, blacklist)
+        key = ("ranked",) + query_key + (space_category, k)
+        stamp = self._source_stamp()
+        cached = self._query_cache.get(key, stamp)
+        if cached is not None:
+            return cached
+        
+        # Only the top k is cached; the full candidate set is scored and dropped.
+        candidates = self._query_plants(*query_key, -1)
+        # Ties keep catalogue order, so equal scores come back the same way query_plants lists them.
+        top = heapq.nlargest(k, enumerate(candidates), key=lambda item: (self._plant_score(item[1], space_category), -item[0]))
+        return self._query_cache.put(key, stamp, [plant for _, plant in top])
+    
+    def _query_key(self,
+                   hardiness_zone: Optional[str],
+                   sun_requirement: Optional[str],
+                   plant_type: Optional[str],
+                   edible_only: bool,
+                   whitelist: Optional[List[str]],
+                   blacklist: Optional[List[str]]) -> Tuple:
+        return (
+            int(''.join(filter(str.isdigit, hardiness_zone))) if hardiness_zone else None,
+            sun_requirement if sun_requirement in self.EXCLUDED_SUN_CLASSES else None,
+            plant_type.lower() if plant_type else None,
+            bool(edible_only),
+            tuple(sorted({w.lower() for w in whitelist or []})),
+            tuple(sorted({b.lower() for b in blacklist or []}))
+        )
+    
+    def _plant_score(self, plant: Dict[str, Any], space_category: Optional[str] = None) -> float:
+        score = (self.EDIBILITY_WEIGHT * as_float(plant["edibility_rating"])
+                 + self.MEDICINAL_WEIGHT * as_float(plant["medicinal_rating"])
+                 + self.HABIT_SCORES.get(plant["plant_type"], 0.0))
+        
+        space_limit = self.SPACE_LIMITS_FEET.get(space_category)
+        if space_limit is not None:
+            score += 1.0 if plant["spacing_feet"] <= space_limit else -2.0
         
+        return score
+    
+    def cache_info(self) -> Dict[str, Any]:
+        return self._query_cache.info()
+    
+    def _query_plants(self,
+                      requested_zone: Optional[int],
+                      sun_requirement: Optional[str],
+                      plant_type: Optional[str],
+                      edible_only: bool,
+                      whitelist: Tuple[str, ...],
+                      blacklist: Tuple[str, ...],
+                      limit: int) -> List[Dict[str, Any]]:
         conn = self._get_connection()
-        cursor = conn.cursor()
+        excluded = self.EXCLUDED_SUN_CLASSES.get(sun_requirement, ())
+        allowed = [sun_class for sun_class in self.SUN_CLASSES if sun_class not in excluded] if excluded else None
+        
+        if self.engine == "numpy":
+            columns = self._load_columns()
+            resolve = lambda term: self._name_ids(conn, (term,), "common_name")
+            include = columns.names_mask(whitelist, resolve) if whitelist else None
+            exclude = columns.names_mask(blacklist, resolve) if blacklist else None
+            mask = columns.mask(requested_zone, allowed, plant_type, edible_only, include, exclude)
+            return columns.select(mask, limit)
+        
+        query, params = self._filter_sql(requested_zone, allowed, plant_type, edible_only, whitelist, blacklist)
+        cursor = conn.execute(query + " LIMIT ?", params + [limit])
+        return [self._plant_record(row).to_dict() for row in cursor.fetchall()]
+    
+    def iter_plants(self, filters: Optional[Dict[str, Any]] = None, batch_size: int = 500) -> Iterator[PlantRecord]:
+        filters = {"edible_only": False, **(filters or {})}
+        unknown = sorted(set(filters) - set(self.FILTER_KEYS))
+        if unknown:
+            raise ValueError(f"Unknown plant filters: {', '.join(unknown)}")
+        requested_zone, sun_requirement, plant_type, edible_only, whitelist, blacklist = self._query_key(
+            filters.get("hardiness_zone"),
+            filters.get("sun_requirement"),
+            filters.get("plant_type"),
+            filters["edible_only"],
+            filters.get("whitelist"),
+            filters.get("blacklist")
+        )
+        excluded = self.EXCLUDED_SUN_CLASSES.get(sun_requirement, ())
+        allowed = [sun_class for sun_class in self.SUN_CLASSES if sun_class not in excluded] if excluded else None
         
+        query, params = self._filter_sql(requested_zone, allowed, plant_type, edible_only, whitelist, blacklist)
+        cursor = self._get_connection().execute(query, params)
+        try:
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    return
+                for row in rows:
+                    yield self._plant_record(row)
+        finally:
+            cursor.close()
+    
+    def _filter_sql(self,
+                    requested_zone: Optional[int],
+                    allowed_sun: Optional[List[str]],
+                    plant_type: Optional[str],
+                    edible_only: bool,
+                    whitelist: Tuple[str, ...],
+                    blacklist: Tuple[str, ...]) -> Tuple[str, List[Any]]:
         query = """
             SELECT 
-                latin_name,
-                common_name,
-                habit,
-                height,
-                hardiness,
-                shade,
-                edibility_rating,
-                medicinal_rating,
-                summary,
-                edible_uses
-            FROM plants
+                t.plant_id,
+                p.latin_name,
+                p.common_name,
+                p.height,
+                p.hardiness,
+                p.edibility_rating,
+                p.medicinal_rating,
+                p.summary,
+                p.edible_uses,
+                t.sun_class,
+                t.habit_class,
+                t.spacing_feet
+            FROM traits.plant_traits t
+            JOIN plants p ON p.rowid = t.plant_id
             WHERE 1=1
         """
-        params = []
+        params: List[Any] = []
         
         if edible_only:
-            query += " AND edibility_rating > 0"
+            query += " AND t.edible = 1"
+        
+        if requested_zone is not None:
+            query += " AND t.zone_min <= ? AND t.zone_max >= ?"
+            params.extend([requested_zone, requested_zone])
+        
+        if allowed_sun:
+            query += f" AND t.sun_class IN ({', '.join('?' for _ in allowed_sun)})"
+            params.extend(allowed_sun)
         
         if whitelist:
-            whitelist_conditions = " OR ".join(["LOWER(common_name) LIKE ?" for _ in whitelist])
-            query += f" AND ({whitelist_conditions})"
-            params.extend([f"%{w.lower()}%" for w in whitelist])
+            names_query, names_params = self._name_search(list(whitelist), "common_name")
+            query += f" AND t.plant_id IN ({names_query})"
+            params.extend(names_params)
         
         if plant_type:
-            query += " AND LOWER(habit) LIKE ?"
-            params.append(f"%{plant_type.lower()}%")
-        
-        query += f" LIMIT {min(limit * 100, 8000)}"
+            query += " AND LOWER(p.habit) LIKE ?"
+            params.append(f"%{plant_type}%")
         
-        cursor.execute(query, params)
-        rows = cursor.fetchall()
+        for b in blacklist:
+            query += " AND instr(LOWER(p.common_name), ?) = 0"
+            params.append(b)
         
-        results = []
-        for row in rows:
-            latin_name, common_name, habit, height, hardiness, shade, edibility, medicinal, summary, edible_uses = row
-            
-            if hardiness_zone and not self._zone_matches(hardiness_zone, hardiness):
-                continue
-            
-            sun_req = self._parse_sun_requirement(shade)
-            
-            if sun_requirement and sun_req != "unknown":
-                if sun_requirement == "full_sun" and sun_req != "full_sun":
-                    continue
-                elif sun_requirement == "partial_shade" and sun_req == "full_shade":
-                    continue
-                elif sun_requirement == "full_shade" and sun_req == "full_sun":
-                    continue
-            
-            if blacklist and any(b.lower() in common_name.lower() for b in blacklist):
-                continue
-            
-            parsed_habit = self._parse_habit(habit)
-            spacing = self._calculate_spacing(habit, height)
-            zones = self._parse_hardiness_zone(hardiness)
-            
-            plant = {
-                "latin_name": latin_name or "Unknown",
-                "common_name": common_name or latin_name or "Unknown",
-                "plant_type": parsed_habit,
-                "hardiness_zones": zones,
-                "sun_requirement": sun_req,
-                "spacing_feet": spacing,
-                "edibility_rating": edibility or 0,
-                "medicinal_rating": medicinal or 0,
-                "height_meters": height,
-                "summary": summary or "",
-                "edible_uses": edible_uses or ""
-            }
-            
-            results.append(plant)
-            
-            if len(results) >= limit:
-                break
+        query += " ORDER BY t.plant_id"
+        return query, params
+    
+    def has_common_name_match(self, term: str) -> bool:
+        names_query, names_params = self._name_search([term.lower()], "common_name")
+        return self._get_connection().execute(f"SELECT EXISTS ({names_query})", names_params).fetchone()[0] == 1
+    
+    def _name_ids(self, conn: sqlite3.Connection, terms: Tuple[str, ...], column: Optional[str] = None) -> List[int]:
+        names_query, names_params = self._name_search(list(terms), column)
+        return [plant_id for plant_id, in conn.execute(names_query, names_params)]
+    
+    def _plant_record(self, row: Tuple) -> PlantRecord:
+        plant_id, latin_name, common_name, height, hardiness, edibility, medicinal, summary, edible_uses, sun_req, parsed_habit, spacing = row
         
-        conn.close()
-        return results
+        return PlantRecord(
+            plant_id=plant_id,
+            latin_name=latin_name or "Unknown",
+            common_name=common_name or latin_name or "Unknown",
+            plant_type=parsed_habit,
+            hardiness_zones=tuple(self._parse_hardiness_zone(hardiness)),
+            sun_requirement=sun_req,
+            spacing_feet=spacing,
+            edibility_rating=edibility or 0,
+            medicinal_rating=medicinal or 0,
+            height_meters=height,
+            summary=summary or "",
+            edible_uses=edible_uses or ""
+        )
     
     def get_plant_by_name(self, name: str) -> Optional[Dict[str, Any]]:
-        conn = self._get_connection()
-        cursor = conn.cursor()
+        return self.get_plants_by_names([name])["plants"].get(name)
+    
+    def _resolved_names(self, terms: List[str]) -> Tuple[str, List[Any]]:
+        # Trigram MATCH needs at least three characters; shorter terms fall back to LIKE on the same table.
+        requested = ", ".join("(?, ?, ?)" for _ in terms)
+        params: List[Any] = []
+        for position, term in enumerate(terms):
+            pattern = "%" + term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+            params.extend([position, term, pattern])
         
-        query = """
-            SELECT 
-                latin_name,
-                common_name,
-                habit,
-                height,
-                hardiness,
-                shade,
-                edibility_rating,
-                medicinal_rating,
-                summary,
-                edible_uses,
-                cultivation_details,
-                propagation
-            FROM plants
-            WHERE LOWER(common_name) LIKE ? OR LOWER(latin_name) LIKE ?
-            LIMIT 1
+        branches = []
+        if any(len(term) >= 3 for term in terms):
+            branches.append("""
+                SELECT r.position, r.term, n.rowid AS plant_id
+                FROM requested r
+                JOIN traits.plant_names n ON n.plant_names MATCH '"' || replace(r.term, '"', '""') || '"'
+                WHERE length(r.term) >= 3
+            """)
+        if any(len(term) < 3 for term in terms):
+            # LIKE cannot use the trigram index, so only pay for the scan when a short term asks for it.
+            branches.append("""
+                SELECT r.position, r.term, n.rowid AS plant_id
+                FROM requested r
+                JOIN traits.plant_names n ON n.common_name LIKE r.pattern ESCAPE '\\' OR n.latin_name LIKE r.pattern ESCAPE '\\'
+                WHERE length(r.term) < 3
+            """)
+        
+        cte = f"""
+            requested(position, term, pattern) AS (VALUES {requested}),
+            candidates AS ({" UNION ALL ".join(branches)}),
+            ranked AS (
+                SELECT
+                    c.position,
+                    c.plant_id,
+                    ROW_NUMBER() OVER (
+                        PARTITION BY c.position
+                        ORDER BY CASE WHEN LOWER(p.common_name) = c.term OR LOWER(p.latin_name) = c.term THEN 0 ELSE 1 END, c.plant_id
+                    ) AS rank
+                FROM candidates c
+                JOIN plants p ON p.rowid = c.plant_id
+            ),
+            resolved AS (
+                SELECT position, plant_id FROM ranked WHERE rank = 1
+            )
         """
+        return cte, params
+    
+    def get_plants_by_names(self, names: List[str]) -> Dict[str, Any]:
+        names_by_term: Dict[str, List[str]] = {}
+        for name in names:
+            names_by_term.setdefault(name.lower(), []).append(name)
+        terms = list(names_by_term)
+        if not terms:
+            return {"plants": {}, "unresolved": []}
         
-        name_pattern = f"%{name.lower()}%"
-        cursor.execute(query, (name_pattern, name_pattern))
-        row = cursor.fetchone()
+        cte, params = self._resolved_names(terms)
+        query = f"""
+            WITH {cte}
+            SELECT 
+                resolved.position,
+                p.latin_name,
+                p.common_name,
+                p.habit,
+                p.height,
+                p.hardiness,
+                p.shade,
+                p.edibility_rating,
+                p.medicinal_rating,
+                p.summary,
+                p.edible_uses,
+                p.cultivation_details,
+                p.propagation
+            FROM resolved
+            JOIN plants p ON p.rowid = resolved.plant_id
+        """
         
-        if not row:
-            conn.close()
-            return None
+        plants: Dict[str, Dict[str, Any]] = {}
+        for row in self._get_connection().execute(query, params):
+            plant = self._plant_details(row[1:])
+            for name in names_by_term[terms[row[0]]]:
+                plants[name] = plant
         
+        unresolved = [name for name in dict.fromkeys(names) if name not in plants]
+        return {"plants": plants, "unresolved": unresolved}
+    
+    def _plant_details(self, row: Tuple) -> Dict[str, Any]:
         latin_name, common_name, habit, height, hardiness, shade, edibility, medicinal, summary, edible_uses, cultivation, propagation = row
         
-        plant = {
+        return {
             "latin_name": latin_name or "Unknown",
             "common_name": common_name or latin_name or "Unknown",
             "plant_type": self._parse_habit(habit),
@@ -239,39 +868,78 @@ class PFAFDatabase:
             "cultivation_details": cultivation or "",
             "propagation": propagation or ""
         }
-        
-        conn.close()
-        return plant
     
     def get_companion_plants(self, plant_name: str) -> Dict[str, Any]:
-        plant = self.get_plant_by_name(plant_name)
+        cte, params = self._resolved_names([plant_name.lower()])
+        query = f"""
+            WITH {cte},
+            neighbors AS (
+                SELECT e.companion_id AS neighbor_id, e.relationship, e.confidence, e.reason
+                FROM resolved
+                CROSS JOIN traits.companion_edges e ON e.plant_id = resolved.plant_id
+                UNION ALL
+                SELECT e.plant_id AS neighbor_id, e.relationship, e.confidence, e.reason
+                FROM resolved
+                CROSS JOIN traits.companion_edges e ON e.companion_id = resolved.plant_id
+            )
+            SELECT p.common_name, p.latin_name, n.relationship, n.confidence, n.reason, n.neighbor_id
+            FROM resolved
+            LEFT JOIN neighbors n ON 1
+            LEFT JOIN plants p ON p.rowid = n.neighbor_id
+            ORDER BY n.confidence DESC, n.neighbor_id
+        """
+        rows = self._get_connection().execute(query, params).fetchall()
         
-        if not plant:
+        if not rows:
             return {
                 "beneficial": [],
                 "antagonistic": [],
                 "note": f"Plant '{plant_name}' not found in database"
             }
         
-        conn = self._get_connection()
-        cursor = conn.cursor()
-        
-        query = """
-            SELECT common_name, plant_type
-            FROM plants
-            WHERE plant_type = ? AND edibility_rating > 0
-            LIMIT 5
-        """
-        
-        cursor.execute(query, (plant['plant_type'],))
-        similar_plants = cursor.fetchall()
+        result: Dict[str, Any] = {"beneficial": [], "antagonistic": [], "relationships": []}
+        seen = set()
+        for common_name, latin_name, relationship, confidence, reason, neighbor_id in rows:
+            if neighbor_id is None or neighbor_id in seen:
+                continue
+            seen.add(neighbor_id)
+            result[relationship].append(common_name or latin_name)
+            result["relationships"].append({
+                "common_name": common_name or latin_name,
+                "latin_name": latin_name,
+                "relationship": relationship,
+                "confidence": confidence,
+                "reason": reason
+            })
         
-        conn.close()
+        if not result["relationships"]:
+            result["note"] = "No companion planting relationships recorded for this plant in PFAF database"
+        return result
+    
+    def get_companion_relationship(self, plant_a: str, plant_b: str) -> Optional[Dict[str, Any]]:
+        return self.get_companion_relationships([plant_a, plant_b]).get((plant_a.lower(), plant_b.lower()))
+    
+    def get_companion_relationships(self, plant_names: List[str]) -> Dict[Tuple[str, str], Dict[str, Any]]:
+        terms = list(dict.fromkeys(name.lower() for name in plant_names))
+        if len(terms) < 2:
+            return {}
         
-        beneficial = [name for name, _ in similar_plants[:3] if name != plant['common_name']]
+        cte, params = self._resolved_names(terms)
+        query = f"""
+            WITH {cte}
+            SELECT a.position, b.position, e.relationship, e.confidence, e.reason
+            FROM resolved a
+            CROSS JOIN traits.companion_edges e ON e.plant_id = a.plant_id
+            JOIN resolved b ON b.plant_id = e.companion_id
+            ORDER BY e.confidence DESC
+        """
         
-        return {
-            "beneficial": beneficial,
-            "antagonistic": [],
-            "note": "Companion planting data is limited in PFAF database"
-        }
+        relationships: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        for position_a, position_b, relationship, confidence, reason in self._get_connection().execute(query, params):
+            pair = (terms[position_a], terms[position_b])
+            if position_a == position_b or pair in relationships:
+                continue
+            entry = {"relationship": relationship, "reason": reason, "confidence": confidence}
+            relationships[pair] = entry
+            relationships[pair[::-1]] = entry
+        return relationships
@@ -1,5 +1,6 @@
 from typing import Any, Callable, Dict, List, Optional
 from abc import ABC, abstractmethod
+import threading
 from langchain_core.tools import BaseTool as LangChainBaseTool
 from langchain_core.tools import StructuredTool
 from pydantic import BaseModel, Field, create_model
@@ -10,11 +11,15 @@ class Tool(ABC):
         self.name = name
         self.description = description
         self.parameters = parameters
+        self._langchain_tool: Optional[LangChainBaseTool] = None
     
     @abstractmethod
     def run(self, **kwargs) -> Any:
         pass
     
+    def warm_up(self):
+        self.to_langchain_tool()
+    
     def validate_input(self, input_data: Dict[str, Any]) -> bool:
         required_params = [
             k for k, v in self.parameters.items() 
@@ -30,6 +35,9 @@ class Tool(ABC):
         }
     
     def to_langchain_tool(self) -> LangChainBaseTool:
+        if self._langchain_tool is not None:
+            return self._langchain_tool
+        
         fields = {}
         for param_name, param_spec in self.parameters.items():
             param_type = param_spec.get("type", "string")
@@ -64,12 +72,13 @@ class Tool(ABC):
         
         args_schema = create_model(f"{self.name}_args", **fields) if fields else None
         
-        return StructuredTool(
+        self._langchain_tool = StructuredTool(
             name=self.name,
             description=self.description,
             func=self.run,
             args_schema=args_schema
         )
+        return self._langchain_tool
 
 
 class FunctionTool(Tool):
@@ -90,6 +99,10 @@ class FunctionTool(Tool):
 class ToolRegistry:
     def __init__(self):
         self._tools: Dict[str, Tool] = {}
+        self._warmup_lock = threading.Lock()
+        self._warmup_thread: Optional[threading.Thread] = None
+        self._warmup_done = threading.Event()
+        self._warmup_status: Dict[str, str] = {}
     
     def register(self, tool: Tool):
         self._tools[tool.name] = tool
@@ -121,3 +134,53 @@ class ToolRegistry:
     
     def clear(self):
         self._tools.clear()
+    
+    def warm_up(self, background: bool = True) -> threading.Event:
+        with self._warmup_lock:
+            if self._warmup_thread is None:
+                self._warmup_status = {name: "pending" for name in self._tools}
+                self._warmup_thread = threading.Thread(
+                    target=self._warm_up_tools,
+                    args=(list(self._tools.values()),),
+                    name="tool-registry-warmup",
+                    daemon=True
+                )
+                self._warmup_thread.start()
+        
+        if not background:
+            self._warmup_done.wait()
+        return self._warmup_done
+    
+    def _warm_up_tools(self, tools: List[Tool]):
+        try:
+            for tool in tools:
+                try:
+                    tool.warm_up()
+                    status = "ready"
+                except Exception as e:
+                    status = f"error: {e}"
+                with self._warmup_lock:
+                    self._warmup_status[tool.name] = status
+        finally:
+            self._warmup_done.set()
+    
+    def is_ready(self) -> bool:
+        return self._warmup_done.is_set() and all(
+            status == "ready" for status in self.readiness()["tools"].values()
+        )
+    
+    def readiness(self) -> Dict[str, Any]:
+        with self._warmup_lock:
+            started = self._warmup_thread is not None
+            tools = dict(self._warmup_status)
+        
+        if not started:
+            status = "cold"
+        elif not self._warmup_done.is_set():
+            status = "warming"
+        elif all(tool_status == "ready" for tool_status in tools.values()):
+            status = "ready"
+        else:
+            status = "degraded"
+        
+        return {"status": status, "tools": tools}
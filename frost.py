@@ -1,10 +1,24 @@
-import requests
-from bs4 import BeautifulSoup
+import argparse
+import asyncio
+import bisect
 import csv
-import time
+import hashlib
+import json
 import logging
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from threading import Lock
+import math
+import os
+import random
+import re
+import stat
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from html.parser import HTMLParser
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, TextIO, Tuple
+
+import httpx
+from bs4 import BeautifulSoup
 
 logging.basicConfig(
     level=logging.INFO,
@@ -12,30 +26,258 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-def get_frost_dates(zip_code: str):
-    url = f"https://www.almanac.com/gardening/frostdates/zipcode/{zip_code}"
-    headers = {
-        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/58.0.3029.110 Safari/537.3"
-    }
-    resp = requests.get(url, headers=headers)
-    resp.raise_for_status()
-    soup = BeautifulSoup(resp.text, "html.parser")
+DEFAULT_BASE_URL = "https://www.almanac.com/gardening/frostdates/zipcode"
+HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/58.0.3029.110 Safari/537.3"
+}
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+FROST_FIELDS = ['last_spring_frost', 'first_fall_frost', 'growing_season']
+
+
+class TokenBucket:
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        if self.rate <= 0:
+            return
+
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+class FrostJournal:
+    def __init__(self, path: str):
+        self.path = path
+        self.appended = 0
+        self._file = None
+
+    def __enter__(self) -> "FrostJournal":
+        self._file = open(self.path, 'a', encoding='utf-8')
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._file.close()
+        self._file = None
+
+    def load(self) -> Dict[str, Dict[str, Any]]:
+        entries: Dict[str, Dict[str, Any]] = {}
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        # A crash mid-write can leave a partial final line.
+                        continue
+                    entries[entry['zipcode']] = entry
+        except FileNotFoundError:
+            pass
+        return entries
+
+    def record(self,
+               zipcode: str,
+               frost_data: Optional[Dict[str, str]],
+               error: Optional[str] = None,
+               inferred_from: Optional[str] = None,
+               fetched_at: Optional[float] = None):
+        entry: Dict[str, Any] = {"zipcode": zipcode, "fetched_at": time.time() if fetched_at is None else fetched_at}
+        if error is None:
+            entry.update(frost_data)
+        else:
+            entry["error"] = error
+        if inferred_from:
+            entry["inferred_from"] = inferred_from
+        self._file.write(json.dumps(entry) + "\n")
+        self._file.flush()
+        self.appended += 1
+
+    def _lines(self) -> Iterator[Tuple[int, str, Optional[str]]]:
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for number, line in enumerate(f):
+                try:
+                    zipcode = json.loads(line)['zipcode']
+                except json.JSONDecodeError:
+                    zipcode = None
+                yield number, line, zipcode
+
+    def compact(self):
+        # Streams the file twice so memory holds one line number per zipcode rather than every entry.
+        try:
+            last_lines: Dict[str, int] = {}
+            total = 0
+            for number, _, zipcode in self._lines():
+                total += 1
+                if zipcode is not None:
+                    last_lines[zipcode] = number
+        except FileNotFoundError:
+            return
+        if len(last_lines) == total:
+            return
+
+        keep = set(last_lines.values())
+        del last_lines
+        with atomic_write(self.path) as out:
+            for number, line, _ in self._lines():
+                if number in keep:
+                    out.write(line.rstrip("\n") + "\n")
+
+
+def _file_mode(path: str) -> int:
+    try:
+        return stat.S_IMODE(os.stat(path).st_mode)
+    except FileNotFoundError:
+        umask = os.umask(0)
+        os.umask(umask)
+        return 0o666 & ~umask
+
+
+@contextmanager
+def atomic_write(path: str, fsync: bool = True) -> Iterator[TextIO]:
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=f".{os.path.basename(path)}-", suffix=".tmp")
+    try:
+        # mkstemp creates the file 0600; keep the target's mode so other users can still read it.
+        os.fchmod(fd, _file_mode(path))
+        with os.fdopen(fd, 'w', newline='', encoding='utf-8') as f:
+            yield f
+            if fsync:
+                f.flush()
+                os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+
+
+class ResponseCache:
+    def __init__(self, directory: str):
+        self.directory = directory
+
+    def _paths(self, url: str) -> Tuple[str, str]:
+        key = hashlib.sha256(url.encode('utf-8')).hexdigest()
+        base = os.path.join(self.directory, key[:2], key)
+        return f"{base}.html", f"{base}.json"
+
+    def get(self, url: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self._paths(url)[1], 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def read_body(self, url: str) -> Optional[str]:
+        try:
+            with open(self._paths(url)[0], 'r', encoding='utf-8') as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    @staticmethod
+    def validators(entry: Optional[Dict[str, Any]]) -> Dict[str, str]:
+        headers: Dict[str, str] = {}
+        if entry:
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def store(self,
+              url: str,
+              html: Optional[str],
+              etag: Optional[str],
+              last_modified: Optional[str],
+              frost_data: Optional[Dict[str, str]],
+              fetched_at: Optional[float] = None):
+        body_path, meta_path = self._paths(url)
+        os.makedirs(os.path.dirname(body_path), exist_ok=True)
+        # The page body is kept even when parsing fails so it can be re-extracted offline.
+        if html is not None:
+            with atomic_write(body_path, fsync=False) as f:
+                f.write(html)
+        entry = {
+            "url": url,
+            "etag": etag,
+            "last_modified": last_modified,
+            "fetched_at": time.time() if fetched_at is None else fetched_at,
+            "frost_data": frost_data
+        }
+        with atomic_write(meta_path, fsync=False) as f:
+            json.dump(entry, f)
+
+
+def is_fresh(entry: Optional[Dict[str, Any]], max_age_seconds: float, now: Optional[float] = None) -> bool:
+    if not entry or "error" in entry:
+        return False
+    now = time.time() if now is None else now
+    return now - entry.get("fetched_at", 0) <= max_age_seconds
+
+
+def has_frost_data(row: Dict[str, str]) -> bool:
+    return all(row.get(field) for field in FROST_FIELDS)
+
+
+def merge_journal(rows: Iterable[Dict[str, str]], entries: Dict[str, Dict[str, Any]]) -> Iterable[Dict[str, str]]:
+    for row in rows:
+        entry = entries.get(row['zipcode'])
+        if entry and "error" not in entry:
+            for field in FROST_FIELDS:
+                row[field] = entry[field]
+        yield row
+
+
+def frost_url(base_url: str, zip_code: str) -> str:
+    return f"{base_url.rstrip('/')}/{zip_code}"
+
+
+class FrostPageError(ValueError):
+    category = "parse_error"
+
+
+class MissingTableError(FrostPageError):
+    category = "missing_table"
+
+
+class MissingRowError(FrostPageError):
+    category = "missing_row"
+
+
+class CellCountError(FrostPageError):
+    category = "wrong_cell_count"
+
+
+def parse_frost_dates_soup(html: str) -> Dict[str, str]:
+    soup = BeautifulSoup(html, "html.parser")
 
     table = soup.find("table", id="frostdates_table")
     if not table:
-        raise ValueError("Could not find table with id `frostdates_table` on the page")
+        raise MissingTableError("Could not find table with id `frostdates_table` on the page")
 
     tbody = table.find("tbody")
     if not tbody:
-        raise ValueError("Table has no <tbody>")
+        raise MissingRowError("Table has no <tbody>")
 
     row = tbody.find("tr")
     if not row:
-        raise ValueError("No <tr> found in tbody")
+        raise MissingRowError("No <tr> found in tbody")
 
     cells = row.find_all("td")
     if len(cells) != 5:
-        raise ValueError(f"Expected 5 <td> cells, but found {len(cells)}")
+        raise CellCountError(f"Expected 5 <td> cells, but found {len(cells)}")
 
     last_spring_frost = cells[2].get_text(strip=True)
     first_fall_frost = cells[3].get_text(strip=True)
@@ -47,76 +289,792 @@ def get_frost_dates(zip_code: str):
         "growing_season": growing_season
     }
 
-def process_zipcode(row, progress_lock, completed, total):
-    zipcode = row['zipcode']
-    
+
+_FROST_TABLE_START = re.compile(r'<table\b[^>]*\bid\s*=\s*["\']?frostdates_table\b', re.IGNORECASE)
+
+
+class _FrostRowDone(Exception):
+    pass
+
+
+class FrostTableParser(HTMLParser):
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.table_depth = 0
+        self.entered_table = False
+        self.seen_tbody = False
+        self.in_tbody = False
+        self.row_depth = 0
+        self.seen_row = False
+        self.cells: List[List[str]] = []
+        self.open_cells: List[int] = []
+
+    def handle_starttag(self, tag, attrs):
+        if self.table_depth == 0:
+            if tag == "table" and not self.entered_table and dict(attrs).get("id") == "frostdates_table":
+                self.table_depth = 1
+                self.entered_table = True
+            return
+
+        if tag == "table":
+            self.table_depth += 1
+        elif tag == "tbody" and not self.seen_tbody:
+            self.seen_tbody = self.in_tbody = True
+        elif self.in_tbody and tag == "tr":
+            if not self.seen_row:
+                self.seen_row = True
+                self.row_depth = 1
+            elif self.row_depth:
+                self.row_depth += 1
+        elif self.row_depth and tag == "td":
+            self.open_cells.append(len(self.cells))
+            self.cells.append([])
+
+    def handle_endtag(self, tag):
+        if self.table_depth == 0:
+            return
+
+        if self.row_depth:
+            if tag == "td" and self.open_cells:
+                self.open_cells.pop()
+            elif tag == "tr":
+                self.row_depth -= 1
+                if self.row_depth == 0:
+                    raise _FrostRowDone()
+        if tag == "tbody" and self.in_tbody and not self.row_depth:
+            self.in_tbody = False
+        elif tag == "table":
+            self.table_depth -= 1
+            if self.table_depth == 0:
+                raise _FrostRowDone()
+
+    def handle_data(self, data):
+        if self.open_cells:
+            text = data.strip()
+            if text:
+                for index in self.open_cells:
+                    self.cells[index].append(text)
+
+
+def parse_frost_dates(html: str) -> Dict[str, str]:
+    if "frostdates_table" not in html:
+        raise MissingTableError("Could not find table with id `frostdates_table` on the page")
+
+    match = _FROST_TABLE_START.search(html)
+    if not match:
+        return parse_frost_dates_soup(html)
+
+    parser = FrostTableParser()
     try:
-        frost_data = get_frost_dates(zipcode)
-        row['last_spring_frost'] = frost_data['last_spring_frost']
-        row['first_fall_frost'] = frost_data['first_fall_frost']
-        row['growing_season'] = frost_data['growing_season']
-        
-        with progress_lock:
-            completed[0] += 1
-            if completed[0] % 100 == 0 or completed[0] == total:
-                logger.info(f"Progress: {completed[0]}/{total} ({completed[0]/total*100:.1f}%) - Last: {zipcode}")
-        
-        return row, None
-    except Exception as e:
-        logger.error(f"Error fetching data for {zipcode}: {e}")
-        row['last_spring_frost'] = ''
-        row['first_fall_frost'] = ''
-        row['growing_season'] = ''
-        
-        with progress_lock:
-            completed[0] += 1
-            if completed[0] % 100 == 0 or completed[0] == total:
-                logger.info(f"Progress: {completed[0]}/{total} ({completed[0]/total*100:.1f}%) - Last: {zipcode}")
-        
-        return row, str(e)
+        parser.feed(html[match.start():])
+        parser.close()
+    except _FrostRowDone:
+        pass
 
-if __name__ == "__main__":
-    input_file = "data/phzm_us_zipcode_2023.csv"
-    output_file = "data/phzm_us_zipcode_2023.csv"
-    max_workers = 10
-    
-    logger.info(f"Starting frost date collection with {max_workers} threads")
-    
-    rows = []
-    with open(input_file, 'r', newline='', encoding='utf-8') as f:
-        reader = csv.DictReader(f)
-        fieldnames = list(reader.fieldnames) + ['last_spring_frost', 'first_fall_frost', 'growing_season']
-        
-        for row in reader:
-            rows.append(row)
-    
-    total = len(rows)
-    logger.info(f"Loaded {total} zipcodes to process")
-    
-    progress_lock = Lock()
-    completed = [0]
-    results = [None] * total
-    error_count = 0
-    
-    with ThreadPoolExecutor(max_workers=max_workers) as executor:
-        future_to_index = {
-            executor.submit(process_zipcode, row, progress_lock, completed, total): i 
-            for i, row in enumerate(rows)
+    if not parser.entered_table:
+        return parse_frost_dates_soup(html)
+    if not parser.seen_tbody:
+        raise MissingRowError("Table has no <tbody>")
+    if not parser.seen_row:
+        raise MissingRowError("No <tr> found in tbody")
+    if len(parser.cells) != 5:
+        raise CellCountError(f"Expected 5 <td> cells, but found {len(parser.cells)}")
+
+    last_spring_frost, first_fall_frost, growing_season = ("".join(cell) for cell in parser.cells[2:])
+    return {
+        "last_spring_frost": last_spring_frost,
+        "first_fall_frost": first_fall_frost,
+        "growing_season": growing_season
+    }
+
+
+def _retry_delay(attempt: int, backoff: float, response: Optional[httpx.Response] = None) -> float:
+    delay = backoff * (2 ** attempt) * (1 + random.random())
+    if response is not None:
+        retry_after = response.headers.get("Retry-After", "")
+        if retry_after.isdigit():
+            delay = max(delay, float(retry_after))
+    return delay
+
+
+class LatencyHistogram:
+    # Log-spaced bucket bounds in milliseconds (1 ms to ~2 min, ~10% wide), so
+    # percentiles stay within one bucket of exact with constant memory.
+    BOUNDS = [1.1 ** i for i in range(124)]
+
+    def __init__(self):
+        self.counts = [0] * (len(self.BOUNDS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = 0.0
+
+    def record(self, ms: float):
+        self.counts[bisect.bisect_left(self.BOUNDS, ms)] += 1
+        self.count += 1
+        self.total += ms
+        self.min = min(self.min, ms)
+        self.max = max(self.max, ms)
+
+    def percentile(self, q: float) -> float:
+        if not self.count:
+            return 0.0
+        target = max(1, math.ceil(q / 100 * self.count))
+        seen = 0
+        for i, n in enumerate(self.counts):
+            seen += n
+            if seen >= target:
+                bound = self.BOUNDS[i] if i < len(self.BOUNDS) else self.max
+                return min(max(bound, self.min), self.max)
+        return self.max
+
+    def to_dict(self) -> Dict[str, float]:
+        summary = {"count": self.count}
+        if self.count:
+            summary.update({
+                "min": round(self.min, 2),
+                "mean": round(self.total / self.count, 2),
+                "p50": round(self.percentile(50), 2),
+                "p90": round(self.percentile(90), 2),
+                "p95": round(self.percentile(95), 2),
+                "p99": round(self.percentile(99), 2),
+                "max": round(self.max, 2)
+            })
+        return summary
+
+
+def error_category(error: BaseException) -> str:
+    if isinstance(error, httpx.HTTPStatusError):
+        return f"http_{error.response.status_code}"
+    if isinstance(error, httpx.TimeoutException):
+        return "timeout"
+    if isinstance(error, httpx.TransportError):
+        return "transport"
+    if isinstance(error, FrostPageError):
+        return error.category
+    return "other"
+
+
+class ScrapeMetrics:
+    def __init__(self):
+        self.started = time.monotonic()
+        self.started_at = time.time()
+        self.latency = LatencyHistogram()
+        self.requests = 0
+        self.bytes_downloaded = 0
+        self.retries = 0
+        self.status_codes: Dict[str, int] = {}
+        self.retry_reasons: Dict[str, int] = {}
+        self.errors: Dict[str, int] = {}
+        self.rows = 0
+        self.fetched = 0
+
+    def record_response(self, seconds: float, status_code: int, size: int):
+        self.requests += 1
+        self.latency.record(seconds * 1000)
+        self.bytes_downloaded += size
+        key = str(status_code)
+        self.status_codes[key] = self.status_codes.get(key, 0) + 1
+
+    def record_transport_error(self, seconds: float):
+        self.requests += 1
+        self.latency.record(seconds * 1000)
+
+    def record_retry(self, reason: str):
+        self.retries += 1
+        self.retry_reasons[reason] = self.retry_reasons.get(reason, 0) + 1
+
+    def record_error(self, error: BaseException, category: Optional[str] = None):
+        category = category or error_category(error)
+        self.errors[category] = self.errors.get(category, 0) + 1
+
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started
+
+    def rows_per_second(self) -> float:
+        elapsed = self.elapsed()
+        return self.rows / elapsed if elapsed > 0 else 0.0
+
+    def __str__(self) -> str:
+        return (f"{self.rows_per_second():.1f} rows/s | {self.requests} requests, "
+                f"p50 {self.latency.percentile(50):.0f}ms p95 {self.latency.percentile(95):.0f}ms "
+                f"p99 {self.latency.percentile(99):.0f}ms | {self.bytes_downloaded / 1e6:.1f} MB | "
+                f"{self.retries} retries | {sum(self.errors.values())} errors")
+
+    def to_dict(self) -> Dict[str, Any]:
+        elapsed = self.elapsed()
+        return {
+            "started_at": self.started_at,
+            "elapsed_seconds": round(elapsed, 3),
+            "rows": self.rows,
+            "fetched": self.fetched,
+            "rows_per_second": round(self.rows_per_second(), 2),
+            "requests": self.requests,
+            "requests_per_second": round(self.requests / elapsed, 2) if elapsed > 0 else 0.0,
+            "bytes_downloaded": self.bytes_downloaded,
+            "status_codes": dict(sorted(self.status_codes.items())),
+            "retries": self.retries,
+            "retry_reasons": dict(sorted(self.retry_reasons.items())),
+            "errors": dict(sorted(self.errors.items())),
+            "latency_ms": self.latency.to_dict()
         }
-        
-        for future in as_completed(future_to_index):
-            index = future_to_index[future]
-            result_row, error = future.result()
-            results[index] = result_row
-            if error:
-                error_count += 1
-    
-    logger.info(f"Completed processing. Errors: {error_count}/{total}")
-    logger.info(f"Writing results to {output_file}")
-    
-    with open(output_file, 'w', newline='', encoding='utf-8') as f:
-        writer = csv.DictWriter(f, fieldnames=fieldnames)
-        writer.writeheader()
-        writer.writerows(results)
-    
-    logger.info("Done!")
\ No newline at end of file
+
+
+async def fetch_frost_response(client: httpx.AsyncClient,
+                               zip_code: str,
+                               base_url: str = DEFAULT_BASE_URL,
+                               limiter: Optional[TokenBucket] = None,
+                               max_retries: int = 3,
+                               backoff: float = 0.5,
+                               metrics: Optional[ScrapeMetrics] = None,
+                               headers: Optional[Dict[str, str]] = None) -> httpx.Response:
+    url = frost_url(base_url, zip_code)
+
+    for attempt in range(max_retries + 1):
+        if limiter:
+            await limiter.acquire()
+
+        started = time.perf_counter()
+        try:
+            resp = await client.get(url, headers=headers)
+        except httpx.TransportError as e:
+            if metrics:
+                metrics.record_transport_error(time.perf_counter() - started)
+            if attempt == max_retries:
+                raise
+            if metrics:
+                metrics.record_retry(error_category(e))
+            delay = _retry_delay(attempt, backoff)
+            logger.warning(f"Retrying {zip_code} in {delay:.1f}s after {type(e).__name__}: {e}")
+            await asyncio.sleep(delay)
+            continue
+
+        if metrics:
+            metrics.record_response(time.perf_counter() - started, resp.status_code, len(resp.content))
+
+        if resp.status_code in RETRYABLE_STATUS_CODES and attempt < max_retries:
+            if metrics:
+                metrics.record_retry(f"http_{resp.status_code}")
+            delay = _retry_delay(attempt, backoff, resp)
+            logger.warning(f"Retrying {zip_code} in {delay:.1f}s after HTTP {resp.status_code}")
+            await asyncio.sleep(delay)
+            continue
+
+        if resp.status_code != 304:
+            resp.raise_for_status()
+        return resp
+
+    raise RuntimeError(f"Exhausted retries for {zip_code}")
+
+
+async def fetch_frost_page(client: httpx.AsyncClient,
+                           zip_code: str,
+                           base_url: str = DEFAULT_BASE_URL,
+                           limiter: Optional[TokenBucket] = None,
+                           max_retries: int = 3,
+                           backoff: float = 0.5,
+                           metrics: Optional[ScrapeMetrics] = None) -> str:
+    resp = await fetch_frost_response(client, zip_code, base_url, limiter, max_retries, backoff, metrics)
+    return resp.text
+
+
+async def get_frost_dates(client: httpx.AsyncClient,
+                          zip_code: str,
+                          base_url: str = DEFAULT_BASE_URL,
+                          limiter: Optional[TokenBucket] = None,
+                          max_retries: int = 3,
+                          backoff: float = 0.5,
+                          metrics: Optional[ScrapeMetrics] = None) -> Dict[str, str]:
+    html = await fetch_frost_page(client, zip_code, base_url, limiter, max_retries, backoff, metrics)
+    return parse_frost_dates(html)
+
+
+def create_client(concurrency: int, timeout: float = 30.0, transport: Optional[httpx.AsyncBaseTransport] = None) -> httpx.AsyncClient:
+    return httpx.AsyncClient(
+        headers=HEADERS,
+        timeout=timeout,
+        limits=httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency),
+        follow_redirects=True,
+        transport=transport
+    )
+
+
+class StageStats:
+    def __init__(self, name: str):
+        self.name = name
+        self.processed = 0
+        self.started = time.monotonic()
+
+    def rate(self) -> float:
+        elapsed = time.monotonic() - self.started
+        return self.processed / elapsed if elapsed > 0 else 0.0
+
+    def __str__(self) -> str:
+        return f"{self.name} {self.processed} ({self.rate():.1f}/s)"
+
+
+def _log_pipeline(stages: List[StageStats], queues: Dict[str, asyncio.Queue]):
+    depths = " ".join(f"{name}={queue.qsize()}/{queue.maxsize}" for name, queue in queues.items())
+    logger.info(f"Pipeline: {' | '.join(str(stage) for stage in stages)} | queues {depths}")
+
+
+async def run_frost_pipeline(planned_rows: Iterable[Tuple[Dict[str, str], bool]],
+                             emit: Callable[[Dict[str, str], Optional[str]], None],
+                             concurrency: int = 10,
+                             rate: float = 0.0,
+                             base_url: str = DEFAULT_BASE_URL,
+                             max_retries: int = 3,
+                             transport: Optional[httpx.AsyncBaseTransport] = None,
+                             journal: Optional[FrostJournal] = None,
+                             parse_workers: int = 0,
+                             queue_size: int = 100,
+                             window: int = 1000,
+                             stats_interval: float = 10.0,
+                             metrics: Optional[ScrapeMetrics] = None,
+                             cache: Optional[ResponseCache] = None) -> Dict[str, int]:
+    limiter = TokenBucket(rate) if rate > 0 else None
+    summary = {"rows": 0, "fetched": 0, "errors": 0}
+
+    fetchers = max(1, concurrency)
+    parsers = max(1, parse_workers)
+    pending: asyncio.Queue = asyncio.Queue(maxsize=fetchers * 2)
+    parse_queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+    write_queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+    # Caps rows between being read and being emitted, which bounds the reorder buffer.
+    in_flight = asyncio.Semaphore(max(1, window))
+    reorder: Dict[int, Tuple[Dict[str, str], Optional[Dict[str, str]], Optional[str], bool]] = {}
+
+    fetch_stats = StageStats("fetch")
+    parse_stats = StageStats("parse")
+    write_stats = StageStats("write")
+    stages = [fetch_stats, parse_stats, write_stats]
+    queues = {"fetch": pending, "parse": parse_queue, "write": write_queue}
+
+    pool = ProcessPoolExecutor(max_workers=parse_workers) if parse_workers > 0 else None
+    loop = asyncio.get_running_loop()
+
+    async def feed():
+        for index, (row, should_fetch) in enumerate(planned_rows):
+            await in_flight.acquire()
+            if should_fetch:
+                await pending.put((index, row))
+            else:
+                await write_queue.put((index, row, None, None, False))
+        for _ in range(fetchers):
+            await pending.put(None)
+
+    async def fetch_page(client: httpx.AsyncClient, zipcode: str) -> Tuple[Optional[str], Optional[Dict[str, Any]], Optional[Dict[str, str]]]:
+        # Returns (page to parse, validators to cache it under, frost data already extracted).
+        if cache is None:
+            return await fetch_frost_page(client, zipcode, base_url, limiter, max_retries, metrics=metrics), None, None
+
+        url = frost_url(base_url, zipcode)
+        entry = cache.get(url)
+        resp = await fetch_frost_response(client, zipcode, base_url, limiter, max_retries, metrics=metrics,
+                                          headers=ResponseCache.validators(entry))
+        if resp.status_code == 304 and entry is not None:
+            if entry.get("frost_data"):
+                return None, None, entry["frost_data"]
+            html = cache.read_body(url)
+            if html is not None:
+                return html, entry, None
+            resp = await fetch_frost_response(client, zipcode, base_url, limiter, max_retries, metrics=metrics)
+        return resp.text, {"etag": resp.headers.get("etag"), "last_modified": resp.headers.get("last-modified")}, None
+
+    async def fetch(client: httpx.AsyncClient):
+        while True:
+            item = await pending.get()
+            if item is None:
+                return
+            index, row = item
+            html, validators, frost_data, error = None, None, None, None
+            try:
+                html, validators, frost_data = await fetch_page(client, row['zipcode'])
+            except Exception as e:
+                error = str(e)
+                if metrics:
+                    metrics.record_error(e)
+            fetch_stats.processed += 1
+            if frost_data is not None:
+                await write_queue.put((index, row, frost_data, None, True))
+            else:
+                await parse_queue.put((index, row, html, validators, error))
+
+    async def parse():
+        while True:
+            item = await parse_queue.get()
+            if item is None:
+                return
+            index, row, html, validators, error = item
+            frost_data = None
+            if error is None:
+                try:
+                    if pool:
+                        frost_data = await loop.run_in_executor(pool, parse_frost_dates, html)
+                    else:
+                        frost_data = parse_frost_dates(html)
+                except Exception as e:
+                    error = str(e)
+                    if metrics:
+                        metrics.record_error(e)
+                if validators is not None:
+                    try:
+                        cache.store(frost_url(base_url, row['zipcode']), html,
+                                    validators.get("etag"), validators.get("last_modified"), frost_data)
+                    except OSError as e:
+                        # The row is still good; only the next run loses its conditional request.
+                        logger.warning(f"Could not cache page for {row['zipcode']}: {e}")
+                        if metrics:
+                            metrics.record_error(e, "cache_write")
+            parse_stats.processed += 1
+            await write_queue.put((index, row, frost_data, error, True))
+
+    async def write():
+        next_index = 0
+        while True:
+            item = await write_queue.get()
+            if item is None:
+                return
+            index, row, frost_data, error, fetched = item
+            if fetched and journal:
+                # Checkpoint on arrival; only emit waits for input order.
+                journal.record(row['zipcode'], frost_data, error)
+            reorder[index] = (row, frost_data, error, fetched)
+
+            while next_index in reorder:
+                row, frost_data, error, fetched = reorder.pop(next_index)
+                next_index += 1
+                zipcode = row['zipcode']
+
+                if fetched:
+                    summary["fetched"] += 1
+                    if error is None:
+                        row.update(frost_data)
+                    else:
+                        summary["errors"] += 1
+                        logger.error(f"Error fetching data for {zipcode}: {error}")
+
+                emit(row, error)
+                in_flight.release()
+                summary["rows"] += 1
+                write_stats.processed += 1
+                if metrics:
+                    metrics.rows += 1
+                    metrics.fetched += fetched
+                if write_stats.processed % 100 == 0:
+                    logger.info(f"Progress: {write_stats.processed} rows written, {summary['fetched']} fetched - Last: {zipcode}")
+
+    def log_stats():
+        _log_pipeline(stages, queues)
+        logger.info(f"Reorder buffer: {len(reorder)}/{window} rows")
+        if metrics:
+            logger.info(f"Metrics: {metrics}")
+
+    async def report():
+        while True:
+            await asyncio.sleep(stats_interval)
+            log_stats()
+
+    reporter = asyncio.create_task(report())
+    try:
+        async with create_client(concurrency, transport=transport) as client:
+            # A failing stage cancels its siblings instead of leaving them blocked on a queue.
+            async with asyncio.TaskGroup() as stages_group:
+                feeder = stages_group.create_task(feed())
+                writer = stages_group.create_task(write())
+                parse_tasks = [stages_group.create_task(parse()) for _ in range(parsers)]
+                fetch_tasks = [stages_group.create_task(fetch(client)) for _ in range(fetchers)]
+
+                await feeder
+                for task in fetch_tasks:
+                    await task
+                for _ in parse_tasks:
+                    await parse_queue.put(None)
+                for task in parse_tasks:
+                    await task
+                await write_queue.put(None)
+                await writer
+    except ExceptionGroup as group:
+        raise group.exceptions[0]
+    finally:
+        reporter.cancel()
+        if pool:
+            pool.shutdown()
+
+    log_stats()
+    return summary
+
+
+async def refresh_frost_dates(rows: List[Dict[str, str]], **pipeline_kwargs) -> Tuple[List[Dict[str, str]], List[Optional[str]]]:
+    results: List[Dict[str, str]] = []
+    errors: List[Optional[str]] = []
+
+    def collect(row: Dict[str, str], error: Optional[str]):
+        if error is not None:
+            for field in FROST_FIELDS:
+                row[field] = ''
+        results.append(row)
+        errors.append(error)
+
+    await run_frost_pipeline(((row, True) for row in rows), collect, **pipeline_kwargs)
+    return results, errors
+
+
+def reextract_cached(rows: Iterable[Dict[str, str]],
+                     cache: ResponseCache,
+                     base_url: str = DEFAULT_BASE_URL,
+                     journal: Optional[FrostJournal] = None,
+                     skip: Optional[Callable[[Dict[str, str]], bool]] = None) -> Iterator[Tuple[Dict[str, str], Optional[str]]]:
+    for row in rows:
+        url = frost_url(base_url, row['zipcode'])
+        entry = cache.get(url)
+        html = cache.read_body(url) if entry and not (skip and skip(row)) else None
+        if html is None:
+            yield row, None
+            continue
+
+        try:
+            frost_data, error = parse_frost_dates(html), None
+        except ValueError as e:
+            frost_data, error = None, str(e)
+        cache.store(url, None, entry.get("etag"), entry.get("last_modified"), frost_data, fetched_at=entry.get("fetched_at"))
+        if error is None:
+            row.update(frost_data)
+        if journal:
+            journal.record(row['zipcode'], frost_data, error, fetched_at=entry.get("fetched_at"))
+        yield row, error
+
+
+def cluster_rows(rows: Iterable[Dict[str, str]]) -> Dict[Tuple[str, str], List[Dict[str, str]]]:
+    clusters: Dict[Tuple[str, str], List[Dict[str, str]]] = {}
+    for row in rows:
+        clusters.setdefault((row['zipcode'][:3], row.get('zone', '')), []).append(row)
+    return clusters
+
+
+def pick_representatives(size: int, samples: int) -> List[int]:
+    if size <= samples:
+        return list(range(size))
+    if samples <= 1:
+        return [0]
+    step = (size - 1) / (samples - 1)
+    return sorted({round(i * step) for i in range(samples)})
+
+
+async def refresh_by_cluster(rows: List[Dict[str, str]],
+                             samples_per_cluster: int = 2,
+                             journal: Optional[FrostJournal] = None,
+                             **refresh_kwargs) -> Tuple[List[Dict[str, Any]], List[Optional[str]]]:
+    clusters = cluster_rows(rows)
+    picks = {key: pick_representatives(len(members), samples_per_cluster) for key, members in clusters.items()}
+
+    sampled = [members[i] for key, members in clusters.items() for i in picks[key]]
+    logger.info(f"Sampling {len(sampled)} representatives from {len(clusters)} clusters")
+    sampled_results, sampled_errors = await refresh_frost_dates(sampled, journal=journal, **refresh_kwargs)
+
+    report = []
+    expand = []
+    position = 0
+    for (prefix, zone), members in clusters.items():
+        reps = picks[(prefix, zone)]
+        rep_results = sampled_results[position:position + len(reps)]
+        rep_errors = sampled_errors[position:position + len(reps)]
+        position += len(reps)
+
+        observed: Dict[Tuple[str, ...], str] = {}
+        for result, error in zip(rep_results, rep_errors):
+            if error is None:
+                observed.setdefault(tuple(result[field] for field in FROST_FIELDS), result['zipcode'])
+        others = [member for i, member in enumerate(members) if i not in reps]
+
+        if not observed:
+            status = "failed"
+        elif len(observed) == 1:
+            status = "agreed"
+            (values, source), = observed.items()
+            frost_data = dict(zip(FROST_FIELDS, values))
+            for member in others:
+                member.update(frost_data)
+                if journal:
+                    journal.record(member['zipcode'], frost_data, inferred_from=source)
+        else:
+            status = "expanded"
+            expand.extend(others)
+
+        report.append({
+            "prefix": prefix,
+            "zone": zone,
+            "size": len(members),
+            "representatives": [members[i]['zipcode'] for i in reps],
+            "status": status,
+            "requests": len(reps) + (len(others) if status == "expanded" else 0),
+            "distinct_results": len(observed)
+        })
+
+    errors = list(sampled_errors)
+    if expand:
+        logger.info(f"Expanding {sum(r['status'] == 'expanded' for r in report)} disagreeing clusters ({len(expand)} zipcodes)")
+        _, expand_errors = await refresh_frost_dates(expand, journal=journal, **refresh_kwargs)
+        errors.extend(expand_errors)
+
+    requests = len(sampled) + len(expand)
+    logger.info(f"Cluster sampling made {requests} requests for {len(rows)} zipcodes")
+    return report, errors
+
+
+def benchmark_parsers(pages: List[str], min_seconds: float = 2.0) -> Dict[str, float]:
+    results = {}
+    for name, parser in (("beautifulsoup", parse_frost_dates_soup), ("streaming", parse_frost_dates)):
+        parsed = 0
+        start = time.perf_counter()
+        while time.perf_counter() - start < min_seconds:
+            for html in pages:
+                try:
+                    parser(html)
+                except ValueError:
+                    pass
+            parsed += len(pages)
+        results[name] = parsed / (time.perf_counter() - start)
+    return results
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Refresh frost dates for every zipcode in the climate CSV")
+    parser.add_argument("--input", default="data/phzm_us_zipcode_2023.csv")
+    parser.add_argument("--output", default="data/phzm_us_zipcode_2023.csv")
+    parser.add_argument("--concurrency", type=int, default=10, help="Maximum in-flight requests")
+    parser.add_argument("--rate", type=float, default=0.0, help="Maximum requests per second (0 = unlimited)")
+    parser.add_argument("--max-retries", type=int, default=3)
+    parser.add_argument("--parse-workers", type=int, default=os.cpu_count() or 1,
+                        help="Processes used to parse pages (0 = parse on the event loop)")
+    parser.add_argument("--queue-size", type=int, default=100, help="Capacity of each inter-stage queue")
+    parser.add_argument("--window", type=int, default=1000,
+                        help="Maximum rows read ahead of the output writer (bounds the reorder buffer)")
+    parser.add_argument("--stats-interval", type=float, default=10.0, help="Seconds between pipeline stats log lines")
+    parser.add_argument("--base-url", default=DEFAULT_BASE_URL, help="Frost date endpoint; zipcodes are appended as a path segment")
+    parser.add_argument("--journal", help="Checkpoint journal path (default: <output>.journal.jsonl)")
+    parser.add_argument("--cache-dir", help="HTTP response cache directory (default: <output>.cache)")
+    parser.add_argument("--no-cache", action="store_true", help="Always download full pages and do not cache them")
+    parser.add_argument("--offline", action="store_true",
+                        help="Re-extract frost dates from cached pages without touching the network")
+    parser.add_argument("--metrics-output", help="Run metrics JSON summary path (default: <output>.metrics.json)")
+    parser.add_argument("--max-age-days", type=float, default=30.0, help="Reuse journal entries younger than this")
+    parser.add_argument("--only-missing", action="store_true", help="Skip rows that already have frost data")
+    parser.add_argument("--no-resume", action="store_true", help="Ignore existing journal entries and refetch everything")
+    parser.add_argument("--cluster-sample", action="store_true",
+                        help="Scrape representatives per (3-digit prefix, zone) cluster and expand only where they disagree")
+    parser.add_argument("--samples-per-cluster", type=int, default=2)
+    parser.add_argument("--cluster-report", help="Write the per-cluster sampling report to this JSON file")
+    parser.add_argument("--benchmark-parsers", metavar="DIR",
+                        help="Compare parser throughput on the saved .html pages in DIR and exit")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None):
+    args = parse_args(argv)
+
+    if args.benchmark_parsers:
+        pages = []
+        for name in sorted(os.listdir(args.benchmark_parsers)):
+            if name.endswith(".html"):
+                with open(os.path.join(args.benchmark_parsers, name), 'r', encoding='utf-8') as f:
+                    pages.append(f.read())
+        results = benchmark_parsers(pages)
+        for name, pages_per_second in results.items():
+            logger.info(f"{name}: {pages_per_second:.0f} pages/s")
+        logger.info(f"Speedup: {results['streaming'] / results['beautifulsoup']:.1f}x")
+        return
+
+    journal = FrostJournal(args.journal or f"{args.output}.journal.jsonl")
+    entries = {} if args.no_resume else journal.load()
+    now = time.time()
+    max_age_seconds = args.max_age_days * 86400
+
+    def needs_fetch(row: Dict[str, str]) -> bool:
+        return (not is_fresh(entries.get(row['zipcode']), max_age_seconds, now)
+                and not (args.only_missing and has_frost_data(row)))
+
+    logger.info(f"Starting frost date collection with concurrency {args.concurrency}")
+    metrics = ScrapeMetrics()
+    cache = None if args.no_cache else ResponseCache(args.cache_dir or f"{args.output}.cache")
+
+    refresh_kwargs = {
+        "concurrency": args.concurrency,
+        "rate": args.rate,
+        "base_url": args.base_url,
+        "max_retries": args.max_retries,
+        "journal": journal,
+        "parse_workers": args.parse_workers,
+        "queue_size": args.queue_size,
+        "stats_interval": args.stats_interval,
+        "metrics": metrics,
+        "cache": cache
+    }
+
+    with open(args.input, 'r', newline='', encoding='utf-8') as f:
+        reader = csv.DictReader(f)
+        fieldnames = list(reader.fieldnames)
+        for field in FROST_FIELDS:
+            if field not in fieldnames:
+                fieldnames.append(field)
+
+        if args.offline:
+            if cache is None:
+                raise SystemExit("--offline needs the response cache; drop --no-cache")
+            errors = 0
+            with journal, atomic_write(args.output) as out:
+                writer = csv.DictWriter(out, fieldnames=fieldnames)
+                writer.writeheader()
+                skip = has_frost_data if args.only_missing else None
+                for row, error in reextract_cached(merge_journal(reader, entries), cache, args.base_url, journal, skip):
+                    if error is not None:
+                        errors += 1
+                        logger.error(f"Error re-extracting cached page for {row['zipcode']}: {error}")
+                    writer.writerow(row)
+                    metrics.rows += 1
+            logger.info(f"Completed offline re-extraction. Rows: {metrics.rows}, errors: {errors}")
+        elif args.cluster_sample:
+            pending = [row for row in reader if needs_fetch(row)]
+            logger.info(f"{len(pending)} zipcodes to process")
+            with journal:
+                report, errors = asyncio.run(refresh_by_cluster(pending, args.samples_per_cluster, **refresh_kwargs))
+            if args.cluster_report:
+                with atomic_write(args.cluster_report) as out:
+                    json.dump(report, out, indent=2)
+            logger.info(f"Completed processing. Requests: {len(errors)}, errors: {sum(e is not None for e in errors)}")
+        else:
+            def plan(rows: Iterable[Dict[str, str]]) -> Iterator[Tuple[Dict[str, str], bool]]:
+                for row in merge_journal(rows, entries):
+                    yield row, needs_fetch(row)
+
+            with journal, atomic_write(args.output) as out:
+                writer = csv.DictWriter(out, fieldnames=fieldnames)
+                writer.writeheader()
+                summary = asyncio.run(run_frost_pipeline(
+                    plan(reader),
+                    lambda row, error: writer.writerow(row),
+                    window=args.window,
+                    **refresh_kwargs
+                ))
+            logger.info(f"Completed processing. Rows: {summary['rows']}, requests: {summary['fetched']}, errors: {summary['errors']}")
+
+    if args.cluster_sample:
+        logger.info(f"Merging journal into {args.output}")
+        entries = journal.load()
+        with open(args.input, 'r', newline='', encoding='utf-8') as f, atomic_write(args.output) as out:
+            writer = csv.DictWriter(out, fieldnames=fieldnames)
+            writer.writeheader()
+            writer.writerows(merge_journal(csv.DictReader(f), entries))
+
+    if journal.appended:
+        journal.compact()
+
+    metrics_path = args.metrics_output or f"{args.output}.metrics.json"
+    with atomic_write(metrics_path) as out:
+        json.dump(metrics.to_dict(), out, indent=2)
+    logger.info(f"Metrics: {metrics} - summary written to {metrics_path}")
+    logger.info("Done!")
+
+
+if __name__ == "__main__":
+    main()
@@ -5,6 +5,7 @@ from agents.tools.garden_tools import (
     GetClimateDataTool,
     QueryPlantDatabaseTool,
     CheckCompanionCompatibilityTool,
+    CheckCompanionMatrixTool,
     CalculatePlanterLayoutTool,
     GeneratePlantingScheduleTool,
     GenerateGardenVisualizationTool
@@ -31,10 +32,13 @@ def create_garden_agent(use_real_llm: bool = False):
     registry = ToolRegistry()
     registry.register(GetClimateDataTool())
     registry.register(QueryPlantDatabaseTool())
-    registry.register(CheckCompanionCompatibilityTool())
+    companion_tool = CheckCompanionCompatibilityTool()
+    registry.register(companion_tool)
+    registry.register(CheckCompanionMatrixTool(companion_tool))
     registry.register(CalculatePlanterLayoutTool())
     registry.register(GeneratePlantingScheduleTool())
     registry.register(GenerateGardenVisualizationTool())
+    registry.warm_up()
     
     prompt_builder = PromptBuilder(
         system_prompt=GARDEN_SYSTEM_PROMPT,
@@ -0,0 +1,160 @@
+import os
+import pytest
+from agents.tools.climate_index import ClimateIndex
+
+
+CSV_HEADER = "zipcode,zone,trange,zonetitle,last_spring_frost,first_fall_frost,growing_season\n"
+
+
+def write_csv(path, rows):
+    path.write_text(CSV_HEADER + "".join(row + "\n" for row in rows), encoding="utf-8")
+    return str(path)
+
+
+def test_climate_index_lookup(tmp_path):
+    csv_path = write_csv(tmp_path / "zips.csv", [
+        "00501,7b,5 to 10,7b: 5 to 10,Apr 16,Oct 28,194 days",
+        "94102,10b,35 to 40,10b: 35 to 40,n/a,infrequent,n/a",
+        "96799,11a,40 to 45,11a: 40 to 45,,,"
+    ])
+    index = ClimateIndex.from_csv(csv_path)
+
+    assert len(index) == 3
+    assert index.get("00501").to_dict() == {
+        "hardiness_zone": "7b",
+        "last_spring_frost": "2024-Apr-16",
+        "first_fall_frost": "2024-Oct-28",
+        "growing_season_days": 194
+    }
+    assert index.get("94102").growing_season_days == 0
+    assert index.get("96799").frost_free
+
+
+def test_climate_record_day_of_year(tmp_path):
+    csv_path = write_csv(tmp_path / "zips.csv", [
+        "00501,7b,5 to 10,7b: 5 to 10,Apr 16,Oct 28,194 days",
+        "94102,10b,35 to 40,10b: 35 to 40,n/a,infrequent,n/a",
+        "99501,5b,-15 to -10,5b: -15 to -10,year-round risk,year-round risk,n/a"
+    ])
+    index = ClimateIndex.from_csv(csv_path)
+
+    record = index.get("00501")
+    assert record.last_spring_frost == 106
+    assert record.first_fall_frost == 301
+    assert record.frost_free is False
+
+    assert index.get("94102").frost_free is True
+    assert index.get("94102").last_spring_frost is None
+
+    assert index.get("99501").frost_free is False
+    assert index.get("99501").last_spring_frost is None
+
+
+def test_climate_index_rejects_malformed_zipcodes(tmp_path):
+    csv_path = write_csv(tmp_path / "zips.csv", [
+        "01234,6b,-5 to 0,6b: -5 to 0,May 9,Oct 3,146 days"
+    ])
+    index = ClimateIndex.from_csv(csv_path)
+
+    assert "01234" in index
+    assert " 1234" not in index
+    assert "1234" not in index
+    assert index.get(None) is None
+
+
+def test_climate_index_unsorted_input_keeps_last_duplicate(tmp_path):
+    csv_path = write_csv(tmp_path / "zips.csv", [
+        "10001,7b,5 to 10,7b: 5 to 10,Apr 1,Nov 1,214 days",
+        "01001,6b,-5 to 0,6b: -5 to 0,May 9,Oct 3,146 days",
+        "10001,7a,0 to 5,7a: 0 to 5,Apr 10,Oct 30,203 days"
+    ])
+    index = ClimateIndex.from_csv(csv_path)
+
+    assert list(index.zipcodes) == [1001, 10001]
+    assert index.get("10001").hardiness_zone == "7a"
+
+
+def test_climate_index_snapshot_round_trip(tmp_path):
+    csv_path = write_csv(tmp_path / "zips.csv", [
+        "00501,7b,5 to 10,7b: 5 to 10,Apr 16,Oct 28,194 days",
+        "94102,10b,35 to 40,10b: 35 to 40,n/a,infrequent,n/a"
+    ])
+
+    built = ClimateIndex.load(csv_path)
+    mapped = ClimateIndex.load(csv_path)
+
+    assert isinstance(mapped.zipcodes, memoryview)
+    assert mapped.get("00501") == built.get("00501")
+    assert mapped.get("94102") == built.get("94102")
+
+
+def test_climate_index_snapshot_is_readable_by_other_users(tmp_path):
+    csv_path = write_csv(tmp_path / "zips.csv", ["00501,7b,5 to 10,7b: 5 to 10,Apr 16,Oct 28,194 days"])
+
+    umask = os.umask(0o022)
+    try:
+        ClimateIndex.load(csv_path)
+    finally:
+        os.umask(umask)
+
+    assert os.stat(tmp_path / "zips.climate").st_mode & 0o777 == 0o644
+
+
+def test_climate_index_snapshot_rebuilds_when_source_changes(tmp_path):
+    csv_path = write_csv(tmp_path / "zips.csv", [
+        "00501,7b,5 to 10,7b: 5 to 10,Apr 16,Oct 28,194 days"
+    ])
+    ClimateIndex.load(csv_path)
+
+    write_csv(tmp_path / "zips.csv", [
+        "00501,8a,10 to 15,8a: 10 to 15,Mar 30,Nov 10,224 days"
+    ])
+    index = ClimateIndex.load(csv_path)
+
+    assert index.get("00501").hardiness_zone == "8a"
+    assert ClimateIndex.load(csv_path).get("00501").hardiness_zone == "8a"
+
+
+def test_climate_index_snapshot_without_source(tmp_path):
+    csv_path = write_csv(tmp_path / "zips.csv", [
+        "00501,7b,5 to 10,7b: 5 to 10,Apr 16,Oct 28,194 days"
+    ])
+    ClimateIndex.load(csv_path)
+    (tmp_path / "zips.csv").unlink()
+
+    assert ClimateIndex.load(csv_path).get("00501").hardiness_zone == "7b"
+
+    (tmp_path / "zips.climate").unlink()
+    with pytest.raises(FileNotFoundError):
+        ClimateIndex.load(csv_path)
+
+
+def test_climate_index_lookup_many(tmp_path):
+    csv_path = write_csv(tmp_path / "zips.csv", [
+        "00501,7b,5 to 10,7b: 5 to 10,Apr 16,Oct 28,194 days",
+        "01001,6b,-5 to 0,6b: -5 to 0,May 9,Oct 3,146 days"
+    ])
+    index = ClimateIndex.from_csv(csv_path)
+
+    result = index.lookup_many(["01001", "99999", "00501", "12", "01001"])
+
+    assert result["zipcode"] == ["01001", "00501", "01001"]
+    assert result["hardiness_zone"] == ["6b", "7b", "6b"]
+    assert result["growing_season_days"] == [146, 194, 146]
+    assert result["missing"] == ["99999"]
+    assert result["invalid"] == ["12"]
+
+
+def test_climate_index_nearest_position_stays_within_prefix(tmp_path):
+    csv_path = write_csv(tmp_path / "zips.csv", [
+        "01001,6b,-5 to 0,6b: -5 to 0,May 9,Oct 3,146 days",
+        "01010,6a,-10 to -5,6a: -10 to -5,May 11,Oct 3,144 days",
+        "01105,6b,-5 to 0,6b: -5 to 0,May 1,Oct 12,163 days"
+    ])
+    index = ClimateIndex.from_csv(csv_path)
+
+    assert index.zipcode_at(index.nearest_position("01004")) == "01001"
+    assert index.zipcode_at(index.nearest_position("01099")) == "01010"
+    assert index.zipcode_at(index.nearest_position("01100")) == "01105"
+    assert index.nearest_position("01200") is None
+    assert index.nearest_position("abcde") is None
@@ -0,0 +1,469 @@
+import asyncio
+import json
+import os
+import httpx
+import pytest
+import frost
+
+
+FIXTURE_DIR = os.path.join(os.path.dirname(__file__), "..", "fixtures", "frost")
+FIXTURE_PAGES = sorted(name for name in os.listdir(FIXTURE_DIR) if name.endswith(".html"))
+
+
+def frost_page(last_spring="Apr 16", first_fall="Oct 28", growing_season="194 days"):
+    return f"""<html><body>
+<table id="frostdates_table">
+  <thead><tr><th>Station</th><th>Distance</th><th>Last Spring Frost</th><th>First Fall Frost</th><th>Growing Season</th></tr></thead>
+  <tbody><tr><td>HOLTSVILLE</td><td>3.1 mi</td><td>{last_spring}</td><td>{first_fall}</td><td>{growing_season}</td></tr></tbody>
+</table>
+</body></html>"""
+
+
+def test_parse_frost_dates():
+    assert frost.parse_frost_dates(frost_page()) == {
+        "last_spring_frost": "Apr 16",
+        "first_fall_frost": "Oct 28",
+        "growing_season": "194 days"
+    }
+
+
+def test_parse_frost_dates_missing_table():
+    with pytest.raises(ValueError, match="frostdates_table"):
+        frost.parse_frost_dates("<html><body><p>Not found</p></body></html>")
+
+
+@pytest.mark.parametrize("page", FIXTURE_PAGES)
+def test_streaming_parser_matches_beautifulsoup(page):
+    with open(os.path.join(FIXTURE_DIR, page), encoding="utf-8") as f:
+        html = f.read()
+
+    def extract(parser):
+        try:
+            return parser(html)
+        except ValueError as e:
+            return str(e)
+
+    assert extract(frost.parse_frost_dates) == extract(frost.parse_frost_dates_soup)
+
+
+def test_get_frost_dates_retries_transient_errors():
+    attempts = []
+
+    def handler(request):
+        attempts.append(request.url.path)
+        if len(attempts) < 3:
+            return httpx.Response(503)
+        return httpx.Response(200, text=frost_page())
+
+    async def fetch():
+        async with frost.create_client(2, transport=httpx.MockTransport(handler)) as client:
+            return await frost.get_frost_dates(client, "00501", base_url="http://stub/frost", backoff=0)
+
+    result = asyncio.run(fetch())
+
+    assert result["last_spring_frost"] == "Apr 16"
+    assert attempts == ["/frost/00501"] * 3
+
+
+def test_get_frost_dates_does_not_retry_client_errors():
+    attempts = []
+
+    def handler(request):
+        attempts.append(request.url.path)
+        return httpx.Response(404)
+
+    async def fetch():
+        async with frost.create_client(2, transport=httpx.MockTransport(handler)) as client:
+            return await frost.get_frost_dates(client, "00501", base_url="http://stub/frost", backoff=0)
+
+    with pytest.raises(httpx.HTTPStatusError):
+        asyncio.run(fetch())
+    assert len(attempts) == 1
+
+
+def test_refresh_frost_dates_keeps_input_order():
+    def handler(request):
+        zipcode = request.url.path.rsplit("/", 1)[-1]
+        if zipcode == "00002":
+            return httpx.Response(200, text="<html></html>")
+        return httpx.Response(200, text=frost_page(last_spring=f"Apr {int(zipcode)}"))
+
+    rows = [{"zipcode": f"{i:05d}", "zone": "7b"} for i in range(1, 6)]
+    results, errors = asyncio.run(frost.refresh_frost_dates(
+        rows,
+        concurrency=3,
+        base_url="http://stub/frost",
+        transport=httpx.MockTransport(handler)
+    ))
+
+    assert errors[1] is not None
+    assert sum(error is not None for error in errors) == 1
+    assert [row["zipcode"] for row in results] == ["00001", "00002", "00003", "00004", "00005"]
+    assert results[0]["last_spring_frost"] == "Apr 1"
+    assert results[1]["last_spring_frost"] == ""
+
+
+def test_token_bucket_limits_rate():
+    async def acquire_all():
+        bucket = frost.TokenBucket(rate=50, capacity=1)
+        start = asyncio.get_running_loop().time()
+        for _ in range(6):
+            await bucket.acquire()
+        return asyncio.get_running_loop().time() - start
+
+    assert asyncio.run(acquire_all()) >= 0.09
+
+
+def write_zip_csv(path, rows):
+    header = "zipcode,zone,last_spring_frost,first_fall_frost,growing_season\n"
+    path.write_text(header + "".join(row + "\n" for row in rows), encoding="utf-8")
+
+
+def stub_transport(requested, failing=()):
+    def handler(request):
+        zipcode = request.url.path.rsplit("/", 1)[-1]
+        requested.append(zipcode)
+        if zipcode in failing:
+            return httpx.Response(404)
+        return httpx.Response(200, text=frost_page(last_spring="May 1", growing_season="150 days"))
+    return httpx.MockTransport(handler)
+
+
+def test_main_resumes_from_journal(tmp_path, monkeypatch):
+    csv_path = tmp_path / "zips.csv"
+    write_zip_csv(csv_path, [
+        "00001,7b,Apr 1,Oct 1,183 days",
+        "00002,7b,Apr 2,Oct 2,183 days",
+        "00003,7b,Apr 3,Oct 3,183 days"
+    ])
+    journal = frost.FrostJournal(str(tmp_path / "zips.journal"))
+    with journal:
+        journal.record("00001", {"last_spring_frost": "Mar 30", "first_fall_frost": "Nov 2", "growing_season": "217 days"})
+
+    requested = []
+    monkeypatch.setattr(frost, "create_client", lambda concurrency, **kwargs: httpx.AsyncClient(transport=stub_transport(requested, failing={"00003"})))
+
+    frost.main(["--input", str(csv_path), "--output", str(csv_path), "--journal", journal.path, "--base-url", "http://stub"])
+
+    assert sorted(requested) == ["00002", "00003"]
+    lines = csv_path.read_text(encoding="utf-8").splitlines()
+    assert lines[0] == "zipcode,zone,last_spring_frost,first_fall_frost,growing_season"
+    assert lines[1] == "00001,7b,Mar 30,Nov 2,217 days"
+    assert lines[2] == "00002,7b,May 1,Oct 28,150 days"
+    assert lines[3] == "00003,7b,Apr 3,Oct 3,183 days"
+
+    entries = journal.load()
+    assert "error" in entries["00003"]
+    assert len((tmp_path / "zips.journal").read_text().splitlines()) == 3
+
+
+def test_main_only_missing(tmp_path, monkeypatch):
+    csv_path = tmp_path / "zips.csv"
+    write_zip_csv(csv_path, [
+        "00001,7b,Apr 1,Oct 1,183 days",
+        "00002,7b,,,"
+    ])
+    requested = []
+    monkeypatch.setattr(frost, "create_client", lambda concurrency, **kwargs: httpx.AsyncClient(transport=stub_transport(requested)))
+
+    frost.main(["--input", str(csv_path), "--output", str(csv_path), "--only-missing", "--base-url", "http://stub"])
+
+    assert requested == ["00002"]
+    assert csv_path.read_text(encoding="utf-8").splitlines()[2] == "00002,7b,May 1,Oct 28,150 days"
+
+
+def test_journal_load_skips_partial_line(tmp_path):
+    path = tmp_path / "zips.journal"
+    path.write_text('{"zipcode": "00001", "fetched_at": 1, "last_spring_frost": "Apr 1", "first_fall_frost": "Oct 1", "growing_season": "183 days"}\n{"zipcode": "000', encoding="utf-8")
+
+    entries = frost.FrostJournal(str(path)).load()
+    assert list(entries) == ["00001"]
+    assert not frost.is_fresh(entries["00001"], max_age_seconds=60)
+    assert frost.is_fresh(entries["00001"], max_age_seconds=60, now=30)
+
+
+def test_journal_compact_keeps_last_entry_per_zipcode(tmp_path):
+    path = tmp_path / "zips.journal"
+    path.write_text('{"zipcode": "00001", "error": "timeout"}\n'
+                    '{"zipcode": "00002", "fetched_at": 1}\n'
+                    '{"zipcode": "00001", "fetched_at": 2}\n'
+                    '{"zipcode": "000', encoding="utf-8")
+
+    journal = frost.FrostJournal(str(path))
+    journal.compact()
+    assert path.read_text(encoding="utf-8").splitlines() == ['{"zipcode": "00002", "fetched_at": 1}', '{"zipcode": "00001", "fetched_at": 2}']
+
+    compacted_at = path.stat().st_mtime_ns
+    journal.compact()
+    assert path.stat().st_mtime_ns == compacted_at
+    frost.FrostJournal(str(tmp_path / "missing.journal")).compact()
+
+
+def test_refresh_by_cluster_expands_only_disagreeing_clusters(tmp_path):
+    requested = []
+
+    def handler(request):
+        zipcode = request.url.path.rsplit("/", 1)[-1]
+        requested.append(zipcode)
+        if zipcode.startswith("011"):
+            return httpx.Response(200, text=frost_page(last_spring=f"May {int(zipcode[3:])}"))
+        return httpx.Response(200, text=frost_page())
+
+    rows = [{"zipcode": f"010{i:02d}", "zone": "6b"} for i in range(1, 6)]
+    rows += [{"zipcode": f"011{i:02d}", "zone": "6a"} for i in range(1, 5)]
+    journal = frost.FrostJournal(str(tmp_path / "zips.journal"))
+
+    with journal:
+        report, errors = asyncio.run(frost.refresh_by_cluster(
+            rows,
+            samples_per_cluster=2,
+            journal=journal,
+            base_url="http://stub",
+            transport=httpx.MockTransport(handler)
+        ))
+
+    by_prefix = {cluster["prefix"]: cluster for cluster in report}
+    assert by_prefix["010"]["status"] == "agreed"
+    assert by_prefix["010"]["representatives"] == ["01001", "01005"]
+    assert by_prefix["010"]["requests"] == 2
+    assert by_prefix["011"]["status"] == "expanded"
+    assert by_prefix["011"]["requests"] == 4
+
+    assert sorted(requested) == ["01001", "01005", "01101", "01102", "01103", "01104"]
+    assert len(errors) == 6
+    assert rows[2]["last_spring_frost"] == "Apr 16"
+
+    entries = journal.load()
+    assert entries["01003"]["inferred_from"] == "01001"
+    assert entries["01102"]["last_spring_frost"] == "May 2"
+
+
+def test_refresh_frost_dates_pipeline_with_parse_pool(caplog):
+    def handler(request):
+        zipcode = request.url.path.rsplit("/", 1)[-1]
+        return httpx.Response(200, text=frost_page(growing_season=f"{int(zipcode)} days"))
+
+    rows = [{"zipcode": f"{i:05d}", "zone": "7b"} for i in range(1, 41)]
+    with caplog.at_level("INFO", logger="frost"):
+        results, errors = asyncio.run(frost.refresh_frost_dates(
+            rows,
+            concurrency=8,
+            base_url="http://stub",
+            transport=httpx.MockTransport(handler),
+            parse_workers=2,
+            queue_size=2
+        ))
+
+    assert errors == [None] * 40
+    assert [row["growing_season"] for row in results] == [f"{i} days" for i in range(1, 41)]
+    assert any("Pipeline: fetch 40" in message and "write 40" in message for message in caplog.messages)
+
+
+def test_run_frost_pipeline_emits_in_input_order():
+    async def handler(request):
+        zipcode = request.url.path.rsplit("/", 1)[-1]
+        await asyncio.sleep((int(zipcode) * 7 % 5) / 1000)
+        return httpx.Response(200, text=frost_page(growing_season=f"{int(zipcode)} days"))
+
+    planned = [({"zipcode": f"{i:05d}", "growing_season": "kept"}, i % 4 != 0) for i in range(1, 31)]
+    emitted = []
+
+    summary = asyncio.run(frost.run_frost_pipeline(
+        iter(planned),
+        lambda row, error: emitted.append(row["growing_season"]),
+        concurrency=6,
+        base_url="http://stub",
+        transport=httpx.MockTransport(handler),
+        window=4
+    ))
+
+    assert emitted == ["kept" if i % 4 == 0 else f"{i} days" for i in range(1, 31)]
+    assert summary == {"rows": 30, "fetched": 23, "errors": 0}
+
+
+def test_run_frost_pipeline_journals_before_reordering(tmp_path):
+    async def handler(request):
+        zipcode = request.url.path.rsplit("/", 1)[-1]
+        if zipcode == "00001":
+            await asyncio.sleep(0.2)
+        return httpx.Response(200, text=frost_page())
+
+    journal = frost.FrostJournal(str(tmp_path / "zips.journal"))
+    journaled_at_first_emit = []
+
+    def emit(row, error):
+        if not journaled_at_first_emit:
+            journaled_at_first_emit.extend(journal.load())
+
+    with journal:
+        asyncio.run(frost.run_frost_pipeline(
+            iter([({"zipcode": f"{i:05d}"}, True) for i in range(1, 6)]),
+            emit,
+            concurrency=5,
+            base_url="http://stub",
+            transport=httpx.MockTransport(handler),
+            journal=journal
+        ))
+
+    assert sorted(journaled_at_first_emit) == ["00001", "00002", "00003", "00004", "00005"]
+    assert len(journal.load()) == 5
+
+
+def test_main_writes_metrics_summary(tmp_path, monkeypatch):
+    csv_path = tmp_path / "zips.csv"
+    write_zip_csv(csv_path, [f"0000{i},7b,,," for i in range(1, 6)])
+    attempts = {}
+
+    def handler(request):
+        zipcode = request.url.path.rsplit("/", 1)[-1]
+        attempts[zipcode] = attempts.get(zipcode, 0) + 1
+        if zipcode == "00002" and attempts[zipcode] == 1:
+            return httpx.Response(503)
+        if zipcode == "00003":
+            return httpx.Response(404)
+        if zipcode == "00004":
+            return httpx.Response(200, text="<html><body>No frostdates_table here</body></html>")
+        if zipcode == "00005":
+            return httpx.Response(200, text=frost_page().replace("<td>3.1 mi</td>", ""))
+        return httpx.Response(200, text=frost_page())
+
+    monkeypatch.setattr(frost, "create_client", lambda concurrency, **kwargs: httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+    monkeypatch.setattr(frost, "_retry_delay", lambda attempt, backoff, response=None: 0)
+    metrics_path = tmp_path / "metrics.json"
+
+    frost.main(["--input", str(csv_path), "--output", str(csv_path), "--base-url", "http://stub",
+                "--parse-workers", "0", "--metrics-output", str(metrics_path)])
+
+    metrics = json.loads(metrics_path.read_text(encoding="utf-8"))
+    assert metrics["rows"] == 5
+    assert metrics["requests"] == 6
+    assert metrics["retries"] == 1
+    assert metrics["retry_reasons"] == {"http_503": 1}
+    assert metrics["status_codes"] == {"200": 4, "404": 1, "503": 1}
+    assert metrics["errors"] == {"http_404": 1, "missing_table": 1, "wrong_cell_count": 1}
+    assert metrics["bytes_downloaded"] > 0
+    assert metrics["latency_ms"]["count"] == 6
+    assert metrics["latency_ms"]["p50"] <= metrics["latency_ms"]["p99"] <= metrics["latency_ms"]["max"]
+
+
+def test_latency_histogram_percentiles():
+    histogram = frost.LatencyHistogram()
+    for ms in range(1, 101):
+        histogram.record(float(ms))
+
+    assert histogram.percentile(50) == pytest.approx(50, rel=0.1)
+    assert histogram.percentile(99) == pytest.approx(99, rel=0.1)
+    assert histogram.percentile(100) == 100
+    assert frost.LatencyHistogram().percentile(50) == 0.0
+
+
+def conditional_transport(requested):
+    def handler(request):
+        zipcode = request.url.path.rsplit("/", 1)[-1]
+        etag = f'"v-{zipcode}"'
+        requested.append((zipcode, request.headers.get("If-None-Match")))
+        if request.headers.get("If-None-Match") == etag:
+            return httpx.Response(304, headers={"ETag": etag})
+        return httpx.Response(200, headers={"ETag": etag}, text=frost_page(growing_season=f"{int(zipcode)} days"))
+    return httpx.MockTransport(handler)
+
+
+def test_pipeline_sends_conditional_requests_and_skips_parsing_on_304(tmp_path, monkeypatch):
+    cache = frost.ResponseCache(str(tmp_path / "cache"))
+    rows = [{"zipcode": f"{i:05d}", "zone": "7b"} for i in range(1, 4)]
+    requested = []
+
+    results, errors = asyncio.run(frost.refresh_frost_dates(
+        rows, base_url="http://stub", transport=conditional_transport(requested), cache=cache))
+    assert errors == [None] * 3
+    assert all(etag is None for _, etag in requested)
+
+    def fail_parse(html):
+        raise AssertionError("304 responses should not be parsed")
+
+    monkeypatch.setattr(frost, "parse_frost_dates", fail_parse)
+    requested.clear()
+    metrics = frost.ScrapeMetrics()
+    rows = [{"zipcode": f"{i:05d}", "zone": "7b"} for i in range(1, 4)]
+    results, errors = asyncio.run(frost.refresh_frost_dates(
+        rows, base_url="http://stub", transport=conditional_transport(requested), cache=cache, metrics=metrics))
+
+    assert errors == [None] * 3
+    assert sorted(requested) == [("00001", '"v-00001"'), ("00002", '"v-00002"'), ("00003", '"v-00003"')]
+    assert [row["growing_season"] for row in results] == ["1 days", "2 days", "3 days"]
+    assert metrics.status_codes == {"304": 3}
+
+
+def test_pipeline_survives_cache_write_failures(tmp_path, monkeypatch):
+    cache = frost.ResponseCache(str(tmp_path / "cache"))
+
+    def disk_full(*args, **kwargs):
+        raise OSError(28, "No space left on device")
+
+    monkeypatch.setattr(cache, "store", disk_full)
+    metrics = frost.ScrapeMetrics()
+    rows = [{"zipcode": f"{i:05d}", "zone": "7b"} for i in range(1, 6)]
+
+    results, errors = asyncio.run(asyncio.wait_for(frost.refresh_frost_dates(
+        rows, base_url="http://stub", transport=conditional_transport([]), cache=cache,
+        metrics=metrics, queue_size=1), timeout=10))
+
+    assert errors == [None] * 5
+    assert [row["growing_season"] for row in results] == [f"{i} days" for i in range(1, 6)]
+    assert metrics.errors == {"cache_write": 5}
+
+
+@pytest.mark.parametrize("stage", ["parse", "write"])
+def test_pipeline_fails_fast_when_a_stage_raises(tmp_path, stage):
+    cache = frost.ResponseCache(str(tmp_path / "cache"))
+
+    def broken(*args, **kwargs):
+        raise RuntimeError(f"{stage} broke")
+
+    if stage == "parse":
+        cache.store = broken
+    rows = [({"zipcode": f"{i:05d}", "zone": "7b"}, True) for i in range(1, 50)]
+    emit = broken if stage == "write" else (lambda row, error: None)
+
+    with pytest.raises(RuntimeError, match=f"{stage} broke"):
+        asyncio.run(asyncio.wait_for(frost.run_frost_pipeline(
+            rows, emit, base_url="http://stub", transport=conditional_transport([]), cache=cache,
+            queue_size=1, window=2), timeout=10))
+
+
+def test_main_offline_reextracts_cached_pages(tmp_path, monkeypatch):
+    csv_path = tmp_path / "zips.csv"
+    write_zip_csv(csv_path, ["00001,7b,,,", "00002,7b,,,"])
+    cache = frost.ResponseCache(str(tmp_path / "zips.csv.cache"))
+    cache.store("http://stub/00001", frost_page(last_spring="May 3"), '"v1"', None, None, fetched_at=1000.0)
+
+    def no_network(concurrency, **kwargs):
+        raise AssertionError("offline mode should not open a client")
+
+    monkeypatch.setattr(frost, "create_client", no_network)
+    frost.main(["--input", str(csv_path), "--output", str(csv_path), "--base-url", "http://stub", "--offline"])
+
+    lines = csv_path.read_text(encoding="utf-8").splitlines()
+    assert lines[1] == "00001,7b,May 3,Oct 28,194 days"
+    assert lines[2] == "00002,7b,,,"
+    assert cache.get("http://stub/00001")["frost_data"]["last_spring_frost"] == "May 3"
+    assert frost.FrostJournal(str(csv_path) + ".journal.jsonl").load()["00001"]["fetched_at"] == 1000.0
+
+
+def test_atomic_write_keeps_file_mode(tmp_path):
+    path = tmp_path / "zips.csv"
+    path.write_text("old", encoding="utf-8")
+    os.chmod(path, 0o664)
+
+    with frost.atomic_write(str(path)) as f:
+        f.write("new")
+    assert path.read_text(encoding="utf-8") == "new"
+    assert os.stat(path).st_mode & 0o777 == 0o664
+
+    umask = os.umask(0o022)
+    try:
+        with frost.atomic_write(str(tmp_path / "fresh.csv")) as f:
+            f.write("new")
+    finally:
+        os.umask(umask)
+    assert os.stat(tmp_path / "fresh.csv").st_mode & 0o777 == 0o644
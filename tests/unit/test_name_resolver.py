@@ -0,0 +1,46 @@
+from agents.tools.name_resolver import NameResolver, normalize_name
+
+
+NAMES = ["Tomato", "Solanum lycopersicum", "Cilantro", "Coriandrum sativum", "Blackcurrant", "Sweet Pepper", "Peas", "Asparagus"]
+
+
+def test_normalize_name_folds_plurals():
+    assert normalize_name("Tomatoes") == "tomato"
+    assert normalize_name("Sweet  Peppers!") == "sweet pepper"
+    assert normalize_name("Blackberries") == "blackberry"
+    assert normalize_name("Asparagus") == "asparagus"
+
+
+def test_name_resolver_exact_and_plural_matches():
+    resolver = NameResolver(NAMES)
+
+    match = resolver.resolve("tomatoes")
+    assert (match.name, match.score) == ("Tomato", 1.0)
+    assert resolver.resolve("pea").name == "Peas"
+    assert resolver.resolve("SOLANUM LYCOPERSICUM").name == "Solanum lycopersicum"
+
+
+def test_name_resolver_tolerates_typos_and_extra_words():
+    resolver = NameResolver(NAMES)
+
+    assert resolver.resolve("tomatoe").name == "Tomato"
+    assert resolver.resolve("cilantro leaf").name == "Cilantro"
+    assert resolver.resolve("blackcurrants").name == "Blackcurrant"
+    assert resolver.resolve("coriandrum sativa").name == "Coriandrum sativum"
+    assert 0.5 <= resolver.resolve("sweet peper").score < 1.0
+
+
+def test_name_resolver_rejects_weak_matches():
+    resolver = NameResolver(NAMES)
+
+    assert resolver.resolve("zucchini") is None
+    assert resolver.resolve("") is None
+    assert resolver.canonical("zucchini") == "zucchini"
+    assert resolver.resolve("tomatillo", min_score=0.2).name == "Tomato"
+
+
+def test_name_resolver_prefers_earlier_names():
+    resolver = NameResolver(["Mint", "mint", "Mints"])
+
+    assert len(resolver) == 1
+    assert resolver.resolve("MINT").name == "Mint"
@@ -0,0 +1,354 @@
+import json
+import os
+import sqlite3
+import time
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+from agents.tools.pfaf_database import PFAFDatabase
+
+
+PLANT_COLUMNS = [
+    "latin_name", "common_name", "habit", "height", "hardiness", "shade",
+    "edibility_rating", "medicinal_rating", "summary", "edible_uses",
+    "cultivation_details", "propagation"
+]
+
+PLANTS = [
+    ("Solanum lycopersicum", "Tomato", "Annual", 1.8, "9-11", "F", 5, 2, "Fruit", "Fruit - raw or cooked", "Full sun", "Seed"),
+    ("Ocimum basilicum", "Basil", "Annual", 0.5, "10-12", "FS", 4, 3, "Herb", "Leaves", "Warm", "Seed"),
+    ("Lactuca sativa", "Lettuce", "Annual", 0.3, "4-9", "SN", 4, 1, "Salad", "Leaves - raw", "Moist", "Seed"),
+    ("Allium sativum", "Garlic", "Bulb", 0.6, "7-10", "F", 5, 5, "Bulb", "Bulb - raw or cooked", "Sun", "Cloves"),
+    ("Malus domestica", "Apple", "Tree", 10.0, "3-8", "FS", 5, 2, "Fruit tree", "Fruit", "Loam", "Grafting"),
+    ("Ribes nigrum", "Blackcurrant", "Shrub", 1.5, "5-9", "SN", 4, 3, "Bush fruit", "Fruit", "Moist", "Cuttings"),
+    ("Atropa belladonna", "Deadly Nightshade", "Perennial", 1.5, "6-9", "SN", 0, 4, "Poisonous", "", "Shade", "Seed"),
+    ("Mentha spicata", "Spearmint", "Perennial", 0.6, "3-7", "FSN", 3, 3, "Herb", "Leaves", "Moist", "Division"),
+]
+
+
+def make_pfaf_db(path, plants=PLANTS):
+    conn = sqlite3.connect(path)
+    conn.execute(f"CREATE TABLE plants ({', '.join(PLANT_COLUMNS)}, plant_type)")
+    conn.executemany(
+        f"INSERT INTO plants ({', '.join(PLANT_COLUMNS)}) VALUES ({', '.join('?' for _ in PLANT_COLUMNS)})",
+        plants
+    )
+    conn.commit()
+    conn.close()
+    return str(path)
+
+
+@pytest.fixture
+def pfaf_db(tmp_path):
+    db = PFAFDatabase(make_pfaf_db(tmp_path / "data.sqlite"))
+    yield db
+    db.close()
+
+
+def test_pfaf_database_reuses_connection_per_thread(pfaf_db):
+    conn = pfaf_db._get_connection()
+    assert pfaf_db._get_connection() is conn
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        other = executor.submit(pfaf_db._get_connection).result()
+    assert other is not conn
+    assert len(pfaf_db._connections) == 2
+
+
+def test_pfaf_database_connections_are_read_only(pfaf_db):
+    with pytest.raises(sqlite3.OperationalError):
+        pfaf_db._get_connection().execute("DELETE FROM plants")
+
+    assert pfaf_db.get_plant_by_name("Tomato")["latin_name"] == "Solanum lycopersicum"
+
+
+def test_pfaf_database_close_releases_connections(pfaf_db):
+    conn = pfaf_db._get_connection()
+    pfaf_db.close()
+
+    assert pfaf_db._connections == []
+    with pytest.raises(sqlite3.ProgrammingError):
+        conn.execute("SELECT 1")
+    assert pfaf_db.get_plant_by_name("Basil")["common_name"] == "Basil"
+
+
+def test_query_plants_filters_in_sql(pfaf_db):
+    names = [plant["common_name"] for plant in pfaf_db.query_plants(hardiness_zone="7b", sun_requirement="full_sun")]
+    assert names == ["Garlic", "Apple", "Spearmint"]
+
+    names = [plant["common_name"] for plant in pfaf_db.query_plants(hardiness_zone="6a", sun_requirement="full_shade", blacklist=["BLACK"])]
+    assert names == ["Lettuce"]
+
+    tree = pfaf_db.query_plants(hardiness_zone="5", plant_type="tree")[0]
+    assert tree["plant_type"] == "tree"
+    assert tree["spacing_feet"] == 10.0
+    assert tree["hardiness_zones"] == ("3", "4", "5", "6", "7", "8")
+
+    assert len(pfaf_db.query_plants(edible_only=False, limit=3)) == 3
+
+
+def test_pfaf_index_is_built_once_and_rebuilt_when_source_changes(tmp_path):
+    db_path = make_pfaf_db(tmp_path / "data.sqlite")
+    with PFAFDatabase(db_path) as db:
+        db.warm_up()
+    index_path = tmp_path / "data.index.sqlite"
+    built_at = index_path.stat().st_mtime_ns
+
+    with PFAFDatabase(db_path) as db:
+        assert len(db.query_plants(hardiness_zone="9")) == 4
+    assert index_path.stat().st_mtime_ns == built_at
+
+    conn = sqlite3.connect(db_path)
+    conn.execute("UPDATE plants SET hardiness = '1-2' WHERE common_name = 'Tomato'")
+    conn.commit()
+    conn.close()
+
+    with PFAFDatabase(db_path) as db:
+        assert [plant["common_name"] for plant in db.query_plants(hardiness_zone="1")] == ["Tomato"]
+
+
+def test_pfaf_index_is_readable_by_other_users(tmp_path):
+    db_path = make_pfaf_db(tmp_path / "data.sqlite")
+    umask = os.umask(0o022)
+    try:
+        PFAFDatabase(db_path).build_index()
+    finally:
+        os.umask(umask)
+
+    assert os.stat(tmp_path / "data.index.sqlite").st_mode & 0o777 == 0o644
+
+
+def test_pfaf_index_falls_back_to_memory_when_unwritable(tmp_path):
+    db_path = make_pfaf_db(tmp_path / "data.sqlite")
+    with PFAFDatabase(db_path, index_path=str(tmp_path / "missing" / "data.index.sqlite")) as db:
+        assert [plant["common_name"] for plant in db.query_plants(hardiness_zone="11")] == ["Tomato", "Basil"]
+
+
+def test_get_plant_by_name_ranks_exact_matches_first(tmp_path):
+    plants = [
+        ("Ananas comosus", "Pineapple", "Perennial", 1.0, "11-12", "F", 4, 1, "", "", "", ""),
+        ("Malus domestica", "Apple", "Tree", 10.0, "3-8", "FS", 5, 2, "", "", "", ""),
+        ("Malus sylvestris", "Crab Apple", "Tree", 9.0, "3-8", "FS", 3, 1, "", "", "", ""),
+    ]
+    with PFAFDatabase(make_pfaf_db(tmp_path / "data.sqlite", plants)) as db:
+        assert db.get_plant_by_name("apple")["common_name"] == "Apple"
+        assert db.get_plant_by_name("APPL")["common_name"] == "Pineapple"
+        assert db.get_plant_by_name("malus sylvestris")["common_name"] == "Crab Apple"
+        assert db.get_plant_by_name("ap")["common_name"] == "Pineapple"
+        assert db.get_plant_by_name('"apple') is None
+
+
+def test_query_plants_whitelist_uses_name_index(pfaf_db):
+    names = [plant["common_name"] for plant in pfaf_db.query_plants(whitelist=["GARL", "mint", "x%"])]
+    assert names == ["Garlic", "Spearmint"]
+
+    names = [plant["common_name"] for plant in pfaf_db.query_plants(whitelist=["to"], edible_only=False)]
+    assert names == ["Tomato"]
+
+
+def test_query_plants_cache_normalizes_keys_and_counts_hits(pfaf_db):
+    first = pfaf_db.query_plants(hardiness_zone="7b", sun_requirement="full_sun", blacklist=["Apple", "garlic"])
+    second = pfaf_db.query_plants(hardiness_zone="7a", sun_requirement="full_sun", blacklist=["GARLIC", "apple"])
+
+    assert second is first
+    assert [plant["common_name"] for plant in first] == ["Spearmint"]
+    info = pfaf_db.cache_info()
+    assert (info["hits"], info["misses"], info["size"]) == (1, 1, 1)
+
+
+def test_query_plants_cache_returns_read_only_results(pfaf_db):
+    plants = pfaf_db.query_plants(hardiness_zone="7")
+    with pytest.raises(TypeError):
+        plants[0]["common_name"] = "Changed"
+    with pytest.raises(AttributeError):
+        plants[0]["hardiness_zones"].append("13")
+
+    assert json.loads(json.dumps(plants))[0]["common_name"] == plants[0]["common_name"]
+
+
+def test_query_plants_cache_evicts_expires_and_invalidates(tmp_path, monkeypatch):
+    db_path = make_pfaf_db(tmp_path / "data.sqlite")
+    with PFAFDatabase(db_path, cache_size=2, cache_ttl=60) as db:
+        for zone in ("5", "6", "7"):
+            db.query_plants(hardiness_zone=zone)
+        assert db.cache_info()["evictions"] == 1
+
+        db.query_plants(hardiness_zone="7")
+        assert db.cache_info()["hits"] == 1
+
+        now = time.monotonic()
+        monkeypatch.setattr(time, "monotonic", lambda: now + 61)
+        db.query_plants(hardiness_zone="7")
+        assert db.cache_info()["hits"] == 1
+        monkeypatch.undo()
+
+        conn = sqlite3.connect(db_path)
+        conn.execute("UPDATE plants SET hardiness = '7-8' WHERE common_name = 'Tomato'")
+        conn.commit()
+        conn.close()
+
+        assert "Tomato" in [plant["common_name"] for plant in db.query_plants(hardiness_zone="7")]
+        assert db.cache_info()["invalidations"] == 1
+
+
+@pytest.mark.parametrize("filters", [
+    {},
+    {"hardiness_zone": "7b", "sun_requirement": "full_sun"},
+    {"hardiness_zone": "6", "sun_requirement": "full_shade", "blacklist": ["black"]},
+    {"plant_type": "annual", "edible_only": False},
+    {"whitelist": ["mint", "to"], "limit": 1},
+])
+def test_numpy_engine_matches_sqlite(tmp_path, filters):
+    pytest.importorskip("numpy")
+    db_path = make_pfaf_db(tmp_path / "data.sqlite")
+    with PFAFDatabase(db_path, engine="sqlite") as sqlite_db, PFAFDatabase(db_path, engine="numpy") as numpy_db:
+        assert numpy_db.query_plants(**filters) == sqlite_db.query_plants(**filters)
+
+
+def test_pfaf_database_rejects_unknown_engine(tmp_path):
+    with pytest.raises(ValueError):
+        PFAFDatabase(make_pfaf_db(tmp_path / "data.sqlite"), engine="pandas")
+
+
+def test_rank_plants_returns_best_candidates(pfaf_db):
+    ranked = [plant["common_name"] for plant in pfaf_db.rank_plants(hardiness_zone="7", k=3)]
+    assert ranked == ["Garlic", "Lettuce", "Blackcurrant"]
+
+    small = [plant["common_name"] for plant in pfaf_db.rank_plants(hardiness_zone="7", space_category="small", k=3)]
+    assert small == ["Garlic", "Lettuce", "Spearmint"]
+
+    assert pfaf_db.rank_plants(hardiness_zone="7", k=3) is pfaf_db.rank_plants(hardiness_zone="7b", k=3)
+
+
+def test_query_plant_database_tool_returns_ranked_plants(pfaf_db):
+    from agents.tools.garden_tools import QueryPlantDatabaseTool
+
+    result = QueryPlantDatabaseTool(pfaf_db=pfaf_db).run(hardiness_zone="5b", sun_requirement="full_sun", space_category="small")
+
+    assert result["source"] == "PFAF"
+    assert [plant["common_name"] for plant in result["plant_list"]] == ["Spearmint", "Apple"]
+
+
+def test_iter_plants_streams_lightweight_records(pfaf_db):
+    from agents.tools.pfaf_database import PlantRecord
+
+    records = list(pfaf_db.iter_plants(batch_size=3))
+    assert len(records) == len(PLANTS)
+    assert all(isinstance(record, PlantRecord) for record in records)
+    assert not hasattr(records[0], "__dict__")
+
+    filtered = list(pfaf_db.iter_plants({"hardiness_zone": "7", "edible_only": True}, batch_size=2))
+    expected = pfaf_db.query_plants(hardiness_zone="7", limit=-1)
+    assert [record.common_name for record in filtered] == [plant["common_name"] for plant in expected]
+    assert json.dumps([record.to_dict() for record in filtered]) == json.dumps(expected)
+
+    with pytest.raises(ValueError, match="zone"):
+        list(pfaf_db.iter_plants({"zone": "7"}))
+
+
+def test_get_plants_by_names_resolves_in_one_query(pfaf_db):
+    result = pfaf_db.get_plants_by_names(["Tomato", "ocimum", "BASIL", "to", "Dragonfruit", "Tomato"])
+
+    assert result["plants"]["Tomato"]["latin_name"] == "Solanum lycopersicum"
+    assert result["plants"]["ocimum"]["common_name"] == "Basil"
+    assert result["plants"]["BASIL"] == result["plants"]["ocimum"]
+    assert result["plants"]["to"]["common_name"] == "Tomato"
+    assert result["plants"]["Tomato"]["propagation"] == "Seed"
+    assert result["unresolved"] == ["Dragonfruit"]
+
+    assert pfaf_db.get_plants_by_names([]) == {"plants": {}, "unresolved": []}
+
+
+def test_companion_graph_is_read_in_both_directions(tmp_path):
+    plants = [
+        ("Solanum lycopersicum", "Tomato", "Annual", 1.8, "9-11", "F", 5, 2, "", "", "Grows badly with fennel.", ""),
+        ("Ocimum basilicum", "Basil", "Annual", 0.5, "10-12", "FS", 4, 3, "", "", "A good companion plant for tomatoes and peppers.", ""),
+        ("Foeniculum vulgare", "Fennel", "Perennial", 1.5, "5-9", "F", 4, 3, "", "", "", ""),
+        ("Capsicum annuum", "Pepper", "Annual", 0.6, "9-11", "F", 4, 1, "", "", "", ""),
+    ]
+    with PFAFDatabase(make_pfaf_db(tmp_path / "data.sqlite", plants)) as db:
+        tomato = db.get_companion_plants("tomato")
+        assert tomato["beneficial"] == ["Basil"]
+        assert tomato["antagonistic"] == ["Fennel"]
+        reasons = {entry["common_name"]: entry["reason"] for entry in tomato["relationships"]}
+        assert reasons["Fennel"] == "Grows badly with fennel."
+
+        assert db.get_companion_plants("Capsicum annuum")["beneficial"] == ["Basil"]
+        assert db.get_companion_relationship("fennel", "Tomato")["relationship"] == "antagonistic"
+        assert db.get_companion_relationship("pepper", "fennel") is None
+        assert "not found" in db.get_companion_plants("Dragonfruit")["note"]
+
+
+def test_companion_graph_keeps_negated_cues_antagonistic(tmp_path):
+    plants = [
+        ("Allium cepa", "Onion", "Bulb", 0.5, "5-10", "F", 5, 2, "", "", "Onions do not grow well with peas or beans.", ""),
+        ("Solanum lycopersicum", "Tomato", "Annual", 1.8, "9-11", "F", 5, 2, "", "", "Does not grow well with fennel. Grows well with basil.", ""),
+        ("Pisum sativum", "Pea", "Annual", 1.0, "3-9", "F", 5, 1, "", "", "", ""),
+        ("Phaseolus vulgaris", "Bean", "Annual", 0.5, "5-10", "F", 5, 1, "", "", "", ""),
+        ("Foeniculum vulgare", "Fennel", "Perennial", 1.5, "5-9", "F", 4, 3, "", "", "", ""),
+        ("Ocimum basilicum", "Basil", "Annual", 0.5, "10-12", "FS", 4, 3, "", "", "", ""),
+    ]
+    with PFAFDatabase(make_pfaf_db(tmp_path / "data.sqlite", plants)) as db:
+        onion = db.get_companion_plants("onion")
+        assert sorted(onion["antagonistic"]) == ["Bean", "Pea"]
+        assert onion["beneficial"] == []
+
+        assert db.get_companion_relationship("tomato", "fennel")["relationship"] == "antagonistic"
+        assert db.get_companion_relationship("tomato", "basil")["relationship"] == "beneficial"
+
+
+def test_companion_tool_falls_back_to_pfaf_graph(tmp_path):
+    from agents.tools.garden_tools import CheckCompanionCompatibilityTool
+
+    plants = [
+        ("Allium sativum", "Garlic", "Bulb", 0.6, "7-10", "F", 5, 5, "", "", "Grows well with roses.", ""),
+        ("Rosa gallica", "Rose", "Shrub", 1.0, "4-8", "F", 2, 1, "", "", "", ""),
+    ]
+    with PFAFDatabase(make_pfaf_db(tmp_path / "data.sqlite", plants)) as db:
+        tool = CheckCompanionCompatibilityTool(pfaf_db=db)
+        assert tool.run(plant_a="rose", plant_b="garlic")["relationship"] == "beneficial"
+        assert tool.run(plant_a="tomato", plant_b="basil")["confidence"] == 0.9
+
+
+def test_companion_matrix_reads_pfaf_graph_in_one_query(tmp_path):
+    from agents.tools.garden_tools import CheckCompanionCompatibilityTool, CheckCompanionMatrixTool
+
+    plants = [
+        ("Allium sativum", "Garlic", "Bulb", 0.6, "7-10", "F", 5, 5, "", "", "Grows well with roses. Grows badly with beans.", ""),
+        ("Rosa gallica", "Rose", "Shrub", 1.0, "4-8", "F", 2, 1, "", "", "", ""),
+        ("Phaseolus vulgaris", "Bean", "Annual", 0.5, "5-10", "F", 5, 1, "", "", "", ""),
+    ]
+    with PFAFDatabase(make_pfaf_db(tmp_path / "data.sqlite", plants)) as db:
+        assert db.get_companion_relationships(["rose", "bean", "garlic"])[("bean", "garlic")]["relationship"] == "antagonistic"
+
+        result = CheckCompanionMatrixTool(CheckCompanionCompatibilityTool(pfaf_db=db)).run(plants=["garlic", "roses", "beans"])
+        assert result["matrix"]["Garlic"] == {"Rose": "beneficial", "Bean": "antagonistic"}
+        assert result["matrix"]["Rose"]["Bean"] == "neutral"
+        assert [(pair["plant_a"], pair["plant_b"]) for pair in result["conflicts"]] == [("Garlic", "Bean")]
+
+
+def test_query_tool_keeps_generic_filter_terms(tmp_path):
+    from agents.tools.garden_tools import QueryPlantDatabaseTool
+
+    plants = [
+        ("Vicia faba", "Broad Bean", "Annual", 1.0, "6-9", "F", 5, 1, "", "", "", ""),
+        ("Phaseolus coccineus", "Runner Bean", "Climber", 3.0, "6-9", "F", 5, 1, "", "", "", ""),
+        ("Solanum lycopersicum", "Tomato", "Annual", 1.8, "6-11", "F", 5, 2, "", "", "", ""),
+    ]
+    with PFAFDatabase(make_pfaf_db(tmp_path / "data.sqlite", plants)) as db:
+        tool = QueryPlantDatabaseTool(pfaf_db=db)
+
+        result = tool.run(hardiness_zone="7", sun_requirement="full_sun", blacklist=["bean"])
+        assert [plant["common_name"] for plant in result["plant_list"]] == ["Tomato"]
+
+        result = tool.run(hardiness_zone="7", sun_requirement="full_sun", whitelist=["Bean"])
+        assert sorted(plant["common_name"] for plant in result["plant_list"]) == ["Broad Bean", "Runner Bean"]
+
+        result = tool.run(hardiness_zone="7", sun_requirement="full_sun", blacklist=["tomatoes"])
+        assert sorted(plant["common_name"] for plant in result["plant_list"]) == ["Broad Bean", "Runner Bean"]
+
+
+def test_rank_plants_caches_only_top_k(pfaf_db):
+    pfaf_db.rank_plants(hardiness_zone="7", k=2)
+
+    info = pfaf_db.cache_info()
+    assert (info["misses"], info["size"]) == (1, 1)
@@ -127,3 +127,41 @@ def test_tool_registry_clear():
     
     registry.clear()
     assert len(registry.get_all_tools()) == 0
+
+
+class FailingWarmupTool(MockTool):
+    def __init__(self):
+        super().__init__()
+        self.name = "failing_tool"
+    
+    def warm_up(self):
+        raise RuntimeError("database unavailable")
+
+
+def test_tool_registry_warm_up():
+    registry = ToolRegistry()
+    tool = MockTool()
+    registry.register(tool)
+    
+    assert registry.readiness()["status"] == "cold"
+    assert not registry.is_ready()
+    
+    registry.warm_up(background=False)
+    
+    assert registry.is_ready()
+    assert registry.readiness() == {"status": "ready", "tools": {"mock_tool": "ready"}}
+    assert tool.to_langchain_tool() is tool.to_langchain_tool()
+
+
+def test_tool_registry_warm_up_reports_errors():
+    registry = ToolRegistry()
+    registry.register(MockTool())
+    registry.register(FailingWarmupTool())
+    
+    done = registry.warm_up()
+    assert done.wait(timeout=5)
+    
+    readiness = registry.readiness()
+    assert readiness["status"] == "degraded"
+    assert readiness["tools"]["failing_tool"].startswith("error")
+    assert not registry.is_ready()